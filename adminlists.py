@@ -0,0 +1,74 @@
+"""
+Paged listings for the admin student and server-code pages.
+
+Both use keyset pagination: a page is the next `limit` rows after a cursor
+taken from the last row of the previous page, so every page is one index
+range read no matter how deep into the list it is (OFFSET would re-read
+everything before it).  Only the columns the pages show are selected.
+
+    students       ordered by id,                  cursor "<id>"
+    submissions    ordered by upload/approval time, cursor "<time>|<id>"
+
+Each function returns (rows as dicts, cursor of the next page or None).
+"""
+
+STUDENTS_SQL = '''SELECT id, name, solved_count, last_solved FROM students
+                  WHERE id > ? AND (? IS NULL OR name LIKE ? ESCAPE '\\')
+                  ORDER BY id LIMIT ?'''
+
+# status -> column the list is ordered by (both lead an index after status)
+SUBMISSION_ORDER = {'pending': 'uploaded_at', 'approved': 'approved_at'}
+
+SUBMISSIONS_SQL = '''SELECT s.id, s.challenge_id, s.student_id, st.name AS student, s.filename,
+                            s.size, s.sha256, s.{column} AS modified,
+                            (SELECT COUNT(*) FROM submissions d
+                             WHERE d.sha256 = s.sha256 AND d.status = 'pending') AS copies
+                     FROM submissions s LEFT JOIN students st ON st.id = s.student_id
+                     WHERE s.status = ? AND (s.{column}, s.id) > (?, ?)
+                       AND (? IS NULL OR s.challenge_id = ?)
+                       AND (? IS NULL OR st.name LIKE ? ESCAPE '\\' OR s.filename LIKE ? ESCAPE '\\')
+                     ORDER BY s.{column}, s.id LIMIT ?'''
+
+
+def like_pattern(text):
+    """LIKE pattern matching `text` anywhere, or None for no filter"""
+    if not text:
+        return None
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _page(rows, limit, cursor):
+    rows = [dict(row) for row in rows]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, cursor(rows[-1])
+    return rows, None
+
+
+def student_page(db, after=None, search=None, limit=100):
+    pattern = like_pattern(search)
+    try:
+        after_id = int(after) if after else 0
+    except ValueError:
+        after_id = 0
+    # One extra row tells whether there is a next page
+    rows = db.execute(STUDENTS_SQL, (after_id, pattern, pattern, limit + 1))
+    return _page(rows, limit, lambda row: str(row['id']))
+
+
+def submission_page(db, status, after=None, challenge_id=None, search=None, limit=100):
+    column = SUBMISSION_ORDER[status]
+    after_time, after_id = '', 0
+    if after:
+        after_time, _, last_id = after.rpartition('|')
+        after_id = int(last_id) if last_id.isdigit() else 0
+    pattern = like_pattern(search)
+    rows = db.execute(SUBMISSIONS_SQL.format(column=column),
+                      (status, after_time, after_id, challenge_id, challenge_id,
+                       pattern, pattern, pattern, limit + 1))
+    return _page(rows, limit, lambda row: f"{row['modified']}|{row['id']}")
+
+
+def count_submissions(db, status):
+    return db.execute('SELECT COUNT(*) FROM submissions WHERE status = ?', (status,)).fetchone()[0]
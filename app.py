@@ -1,43 +1,249 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
+from flask import Flask, request, jsonify, render_template, session, redirect, url_for, g, has_app_context, flash
 import sqlite3
+import json
 import redis
-import hashlib
 import secrets
-import subprocess
-import sys
 import os
-import time
 from datetime import datetime
 from functools import wraps
-from cryptography.fernet import Fernet
-import base64
+import threading
+from launcher import LauncherPool, wait_for_port
+from instances import InstanceRegistry, instance_key, file_sha256, ACTIVITY_KEY, EXPIRED_PREFIX
+from reaper import InstanceReaper
+from jobs import LaunchJobs, LaunchError, ACTIVE_PREFIX
+from ports import PortAllocator
+from gateway import GatewayClient, GatewayError
+from logpump import InstanceLogs
+from codestore import CodeStore
+from flags import FlagKeyCache, SCHEMES, DEFAULT_SCHEME, flag_digest
+from dbpool import ConnectionPool
+from solvewriter import SolveWriter
+from leaderboard import Leaderboard, valid_cursor
+from studentview import StudentViews, STUDENT_PREFIX
+from catalog import ChallengeCatalog
+from importer import import_students
+from adminlists import student_page, submission_page, count_submissions
+from passwords import hash_password, LoginVerifier, LoginOverloaded
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from pagecache import RenderCache, etag_for
+from redissession import RedisSessionInterface
+import py_compile
+
+def load_secret_key(path):
+    """CTF_SECRET_KEY if set, else the key stored in `path` (created on first start)"""
+    if os.environ.get('CTF_SECRET_KEY'):
+        return os.environ['CTF_SECRET_KEY']
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    # Write a temp file and link it into place, so concurrent first starts agree on one key
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(secrets.token_hex(32))
+    try:
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp_path)
+    with open(path) as f:
+        return f.read().strip()
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)
+app.config['SECRET_KEY_FILE'] = os.path.join(os.getcwd(), 'secret_key')  # same key for every worker and restart
+app.secret_key = load_secret_key(app.config['SECRET_KEY_FILE'])
+app.config['SESSION_BACKEND'] = os.environ.get('CTF_SESSION_BACKEND', 'cookie')  # or 'redis' (server-side)
+app.config['SESSION_TTL'] = 7 * 24 * 3600  # seconds an idle Redis session lives
 app.config['DATABASE'] = 'ctf.db'
+app.config['DB_POOL_SIZE'] = 8  # idle SQLite connections kept for reuse between requests
+app.config['DB_BUSY_TIMEOUT'] = 5  # seconds a writer waits for the database lock
+app.config['SOLVE_BATCH_SIZE'] = 256  # solves committed together by the writer thread
+app.config['SOLVE_BATCH_WINDOW'] = 0.02  # seconds the writer waits to fill a batch
+app.config['STUDENT_VIEW_TTL'] = 300  # seconds cached dashboard/challenge page data may live
+app.config['HASH_WORKERS'] = os.cpu_count() or 2  # processes hashing passwords for bulk imports
+app.config['LOGIN_WORKERS'] = os.cpu_count() or 2  # processes verifying login passwords
+app.config['LOGIN_MAX_PENDING'] = 64  # logins queued or running before new ones get 503
+app.config['LOGIN_TIMEOUT'] = 10  # seconds a login waits for its password check
+app.config['ADMIN_PAGE_SIZE'] = 100  # rows per page of the admin student and server-code lists
+app.config['RANKING_PAGE_SIZE'] = 50  # students per /ranking page
+app.config['RANKING_MAX_AGE'] = 5  # seconds browsers may reuse /ranking before revalidating
 app.config['REDIS_HOST'] = 'localhost'
 app.config['REDIS_PORT'] = 6379
 app.config['REDIS_DB'] = 0
+app.config['LAUNCHER_POOL_SIZE'] = 4  # warm interpreters kept ready for challenge starts
+app.config['INSTANCE_IDLE_TIMEOUT'] = 1800  # seconds without activity before an instance is reclaimed
+app.config['REAPER_INTERVAL'] = 30
+app.config['START_TIMEOUT'] = 10  # seconds a server gets to print its port and start listening
+app.config['LAUNCH_WORKERS'] = 8
+app.config['PORT_RANGE_START'] = 20000  # challenge instances bind ports from this range
+app.config['PORT_RANGE_END'] = 29999
+app.config['LAUNCH_MODE'] = os.environ.get('CTF_LAUNCH_MODE', 'process')  # or 'gateway' (run gateway.py)
+app.config['GATEWAY_CONTROL_PORT'] = 5050
+app.config['CODE_STORE_DIR'] = os.path.join(os.getcwd(), 'blobs')  # content-addressed uploads
+app.config['INSTANCE_LOG_DIR'] = os.path.join(os.getcwd(), 'logs', 'instances')
+app.config['INSTANCE_LOG_BYTES'] = 256 * 1024  # per segment; each instance keeps at most two
 
 redis_client = redis.Redis(host=app.config['REDIS_HOST'],
                           port=app.config['REDIS_PORT'],
                           db=app.config['REDIS_DB'],
                           decode_responses=True)
+if app.config['SESSION_BACKEND'] == 'redis':
+    app.session_interface = RedisSessionInterface(redis_client, ttl=app.config['SESSION_TTL'])
+
+port_allocator = PortAllocator(redis_client,
+                               app.config['PORT_RANGE_START'],
+                               app.config['PORT_RANGE_END'],
+                               lease_ttl=app.config['INSTANCE_IDLE_TIMEOUT'] + 2 * app.config['REAPER_INTERVAL'])
+gateway_client = GatewayClient(port=app.config['GATEWAY_CONTROL_PORT'])
+challenge_catalog = ChallengeCatalog(redis_client)
+student_views = StudentViews(redis_client, challenge_catalog, ttl=app.config['STUDENT_VIEW_TTL'])
+instance_registry = InstanceRegistry(redis_client,
+                                     ttl=app.config['INSTANCE_IDLE_TIMEOUT'],
+                                     ports=port_allocator,
+                                     gateway=gateway_client,
+                                     # instance keys are "{student_id}-{challenge_id}"
+                                     on_change=lambda key: student_views.invalidate(key.split('-', 1)[0]))
+instance_logs = InstanceLogs(app.config['INSTANCE_LOG_DIR'])
+instance_reaper = InstanceReaper(instance_registry,
+                                 idle_timeout=app.config['INSTANCE_IDLE_TIMEOUT'],
+                                 interval=app.config['REAPER_INTERVAL'],
+                                 log_path=instance_logs.path_for)  # output counts as activity
+flag_keys = FlagKeyCache()
+code_store = CodeStore(app.config['CODE_STORE_DIR'])
+launch_jobs = LaunchJobs(redis_client, max_workers=app.config['LAUNCH_WORKERS'],
+                         # start timeout plus the wait for the instance lock
+                         stale_after=app.config['START_TIMEOUT'] + 60)
+leaderboard = Leaderboard(redis_client)
+ranking_cache = RenderCache()
+api_cache = RenderCache()
+
+launcher_pool = None
+_launcher_lock = threading.Lock()
+
+def get_launcher_pool():
+    """Create the warm launcher pool on first use (call at startup to pre-warm)"""
+    global launcher_pool
+    with _launcher_lock:
+        if launcher_pool is None:
+            env = os.environ.copy()
+            env['PYTHONPATH'] = os.getcwd()  # Add current directory to Python path
+            launcher_pool = LauncherPool(size=app.config['LAUNCHER_POOL_SIZE'],
+                                         cwd=os.getcwd(),
+                                         env=env)
+        return launcher_pool
+
+hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+def get_hash_pool():
+    """Worker processes for password hashing, started on first use"""
+    global hash_pool
+    with _hash_pool_lock:
+        if hash_pool is None:
+            # spawn: forking a process that already runs request and reaper threads is unsafe
+            hash_pool = ProcessPoolExecutor(max_workers=app.config['HASH_WORKERS'],
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return hash_pool
+
+def discard_hash_pool(pool):
+    """Drop a hash pool whose workers died, so the next import starts a new one"""
+    global hash_pool
+    with _hash_pool_lock:
+        if hash_pool is pool:
+            hash_pool = None
+    pool.shutdown(wait=False)
+
+def _login_executor():
+    return ProcessPoolExecutor(max_workers=app.config['LOGIN_WORKERS'],
+                               mp_context=multiprocessing.get_context('spawn'))
+
+login_verifier = LoginVerifier(_login_executor,
+                               max_pending=app.config['LOGIN_MAX_PENDING'],
+                               timeout=app.config['LOGIN_TIMEOUT'])
+
+def authenticate(db, username, password):
+    """Student row if the password matches, else None; raises LoginOverloaded.
+
+    Hashes are checked in worker processes; legacy SHA-256 hashes are
+    replaced with scrypt on a successful login.
+    """
+    student = db.execute('SELECT * FROM students WHERE name = ?', (username,)).fetchone()
+    if not student:
+        return None
+    valid, new_hash = login_verifier.check(password, student['hashed_pw'])
+    if not valid:
+        return None
+    if new_hash:
+        try:
+            db.execute('UPDATE students SET hashed_pw = ? WHERE id = ?', (new_hash, student['id']))
+            db.commit()
+        except sqlite3.Error as e:
+            # The password was right; the upgrade is retried on the next login
+            db.rollback()
+            print(f"Password rehash failed for student {student['id']}: {e}")
+    return student
+
+def start_background_services():
+    """Start per-process helpers (warm launcher pool, instance reaper)"""
+    get_launcher_pool()
+    instance_reaper.start()
+
+db_pool = None
+_db_pool_lock = threading.Lock()
+
+# Hot queries: one SQL string each so every pooled connection reuses its prepared statement
+CHALLENGE_BY_ID_SQL = 'SELECT * FROM challenges WHERE id = ?'
+SOLVED_SQL = 'SELECT * FROM student_challenges WHERE student_id = ? AND challenge_id = ?'
+# Walks idx_students_ranking (solved_count/last_solved are kept up to date by triggers);
+# /ranking uses it when the Redis leaderboard is unavailable
+RANKING_SQL = '''SELECT name, solved_count, last_solved FROM students
+                 ORDER BY solved_count DESC, last_solved ASC LIMIT ?'''
+
+def get_db_pool():
+    global db_pool
+    with _db_pool_lock:
+        if db_pool is None:
+            db_pool = ConnectionPool(app.config['DATABASE'],
+                                     size=app.config['DB_POOL_SIZE'],
+                                     busy_timeout=app.config['DB_BUSY_TIMEOUT'])
+        return db_pool
 
 def get_db():
-    db = sqlite3.connect(app.config['DATABASE'])
-    db.row_factory = sqlite3.Row
-    return db
+    """The request's connection (borrowed from the pool, returned on teardown).
+
+    Outside an app context this is a new connection the caller must close.
+    """
+    if not has_app_context():
+        return get_db_pool().connect()
+    if 'db' not in g:
+        g.db = get_db_pool().acquire()
+    return g.db
+
+solve_writer = SolveWriter(lambda: get_db_pool().connect(),
+                           max_batch=app.config['SOLVE_BATCH_SIZE'],
+                           max_delay=app.config['SOLVE_BATCH_WINDOW'])
+
+@app.teardown_appcontext
+def release_db(exception):
+    db = g.pop('db', None)
+    if db is not None:
+        get_db_pool().release(db)
 
 def init_db():
     with app.app_context():
-        db = get_db()
+        db = get_db_pool().connect()
         db.executescript('''
             CREATE TABLE IF NOT EXISTS challenges (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
                 description TEXT,
-                secret TEXT NOT NULL
+                secret TEXT NOT NULL,
+                flag_scheme TEXT NOT NULL DEFAULT 'fernet'
             );
 
             CREATE TABLE IF NOT EXISTS students (
@@ -55,10 +261,196 @@ def init_db():
                 FOREIGN KEY(student_id) REFERENCES students(id),
                 FOREIGN KEY(challenge_id) REFERENCES challenges(id)
             );
+
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                challenge_id INTEGER NOT NULL,
+                student_id INTEGER NOT NULL,
+                filename TEXT NOT NULL UNIQUE,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                uploaded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                approved_at DATETIME
+            );
+
+            -- "latest approved file for (challenge, student)" and "for challenge" lookups
+            CREATE INDEX IF NOT EXISTS idx_submissions_student_approved
+                ON submissions(challenge_id, student_id, status, approved_at);
+            CREATE INDEX IF NOT EXISTS idx_submissions_challenge_approved
+                ON submissions(challenge_id, status, approved_at);
+            CREATE INDEX IF NOT EXISTS idx_submissions_status
+                ON submissions(status, uploaded_at);
         ''')
+        add_column_if_missing(db, 'challenges', 'flag_scheme', "TEXT NOT NULL DEFAULT 'fernet'")
+        sync_submissions(db)
         db.commit()
+        migrate_db(db)
+        rebuild_leaderboard(db)
         db.close()
 
+def rebuild_leaderboard(db):
+    """Resync the Redis leaderboard with SQLite (at startup and after offline imports)"""
+    try:
+        leaderboard.rebuild(db)
+    except redis.RedisError as e:
+        print(f"Leaderboard rebuild skipped, Redis unavailable: {e}")
+
+# Versioned schema changes, applied in order; PRAGMA user_version records how many ran.
+# Append new steps, never edit or reorder applied ones.
+MIGRATIONS = [
+    # 1: ranking and per-challenge solve lookups served from indexes
+    '''
+    ALTER TABLE students ADD COLUMN solved_count INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE students ADD COLUMN last_solved DATETIME;
+    UPDATE students SET
+        solved_count = (SELECT COUNT(*) FROM student_challenges WHERE student_id = students.id),
+        last_solved = (SELECT MAX(solved_at) FROM student_challenges WHERE student_id = students.id);
+
+    -- Covers the ranking query: rows come out in ranking order, no sort or table lookup
+    CREATE INDEX idx_students_ranking ON students(solved_count DESC, last_solved ASC, name);
+    CREATE INDEX idx_student_challenges_challenge ON student_challenges(challenge_id, solved_at);
+    CREATE INDEX idx_student_challenges_solved_at ON student_challenges(solved_at);
+
+    -- Keep the per-student totals in the same transaction as the solve itself
+    CREATE TRIGGER student_challenges_solved AFTER INSERT ON student_challenges
+    BEGIN
+        UPDATE students SET solved_count = solved_count + 1,
+                            last_solved = MAX(COALESCE(last_solved, NEW.solved_at), NEW.solved_at)
+        WHERE id = NEW.student_id;
+    END;
+    CREATE TRIGGER student_challenges_unsolved AFTER DELETE ON student_challenges
+    BEGIN
+        UPDATE students SET solved_count = solved_count - 1,
+                            last_solved = (SELECT MAX(solved_at) FROM student_challenges
+                                           WHERE student_id = OLD.student_id)
+        WHERE id = OLD.student_id;
+    END;
+    ''',
+    # 2: keyset-paged admin server-code lists (pending pages walk idx_submissions_status)
+    '''
+    CREATE INDEX idx_submissions_approved ON submissions(status, approved_at);
+    CREATE INDEX idx_submissions_sha256 ON submissions(sha256, status);
+    ''',
+]
+
+def migrate_db(db):
+    """Apply the MIGRATIONS this database has not seen yet, one transaction each"""
+    version = db.execute('PRAGMA user_version').fetchone()[0]
+    for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        db.executescript(f'BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;')
+
+def add_column_if_missing(db, table, column, definition):
+    """Bring databases created before a column existed up to date"""
+    columns = {row['name'] for row in db.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+def sync_submissions(db):
+    """Catalog files in tmp/ and tmp_checked/ that predate the submissions table"""
+    known = {row['filename'] for row in db.execute('SELECT filename FROM submissions')}
+    for dirname, status in (('tmp', 'pending'), ('tmp_checked', 'approved')):
+        directory = os.path.join(os.getcwd(), dirname)
+        if not os.path.exists(directory):
+            continue
+        for filename in os.listdir(directory):
+            parts = filename.split('_', 2)
+            if (filename in known or not filename.endswith('.py') or len(parts) != 3
+                    or not parts[0].isdigit() or not parts[1].isdigit()):
+                continue
+            filepath = os.path.join(directory, filename)
+            modified = datetime.utcfromtimestamp(os.path.getmtime(filepath)).strftime('%Y-%m-%d %H:%M:%S')
+            db.execute('''INSERT INTO submissions
+                         (challenge_id, student_id, filename, sha256, size, status, uploaded_at, approved_at)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                      (int(parts[0]), int(parts[1]), filename, file_sha256(filepath),
+                       os.path.getsize(filepath), status, modified,
+                       modified if status == 'approved' else None))
+
+def launch_instance(key, server_path, file_hash, ctf_answer, flag_key):
+    """Launch job body: start the server and wait (bounded) until its port is ready"""
+    with instance_registry.lock(key):
+        # Another worker may have finished a launch while this job was queued
+        existing = instance_registry.get(key)
+        if existing:
+            if instance_registry.is_current(key, existing, file_hash, flag_key):
+                instance_registry.touch(key, existing['port'])
+                return existing['port']
+            instance_registry.stop(key, existing)
+
+        # Lease a port for the child to bind; the answer is also handed to the child
+        # at spawn, Redis only serves servers that look it up themselves
+        leased_port = port_allocator.lease(key)
+        if leased_port is None:
+            raise LaunchError('No free challenge ports right now, please try again shortly')
+        pipe = redis_client.pipeline()
+        pipe.set(key, leased_port, ex=instance_registry.ttl)
+        pipe.set(str(leased_port), ctf_answer, ex=instance_registry.ttl)
+        pipe.execute()
+
+        if app.config['LAUNCH_MODE'] == 'gateway':
+            # Host the module's handle_client in the shared gateway process
+            try:
+                pid = gateway_client.load(key, server_path, leased_port, ctf_answer)
+                instance_registry.register(key, None, leased_port, file_hash, ctf_answer,
+                                           mode='gateway', pid=pid, flag_digest=flag_key)
+                return leased_port
+            except (GatewayError, OSError) as e:
+                # e.g. no handle_client in the file, or gateway not running
+                print(f"Gateway load failed for {key}, using a dedicated process: {e}")
+
+        # Hand the file to a pre-warmed interpreter (cwd and PYTHONPATH are set by the pool)
+        # Precompiled bytecode when the code was approved through the store; the server
+        # writes its own log, so it keeps working after this web worker exits
+        proc = get_launcher_pool().launch(code_store.launch_path(file_hash, server_path),
+                                          env={'CTF_PORT': str(leased_port), 'CTF_ANSWER': ctf_answer},
+                                          log_path=instance_logs.path_for(key),
+                                          log_bytes=app.config['INSTANCE_LOG_BYTES'])
+        try:
+            # The server must print its port first and then listen on it
+            port, _ = wait_for_port(proc, app.config['START_TIMEOUT'])
+        except (TimeoutError, ValueError) as e:
+            proc.kill()
+            proc.wait()
+            error_output = '\n'.join(instance_logs.tail(key, 20))
+            redis_client.delete(key, str(leased_port))
+            port_allocator.release(leased_port, key)
+            raise LaunchError(f'Server failed to start properly: {e}. Error: {error_output}')
+        finally:
+            proc.stdout.close()
+            proc.stderr.close()
+
+        if port != leased_port:
+            # Older uploads ignore CTF_PORT and bind a random port
+            redis_client.delete(str(leased_port))
+            port_allocator.release(leased_port, key)
+
+        # Update Redis with actual port and record the instance
+        instance_registry.register(key, proc, port, file_hash, ctf_answer, flag_digest=flag_key)
+        return port
+
+def update_leaderboard(db, student_id):
+    """Push a student's committed totals to the Redis leaderboard"""
+    student = db.execute('SELECT name, solved_count, last_solved FROM students WHERE id = ?',
+                         (student_id,)).fetchone()
+    if student:
+        try:
+            leaderboard.record_solve(student['name'], student['solved_count'], student['last_solved'])
+        except redis.RedisError as e:
+            # The solve is saved; `python leaderboard.py rebuild` brings the board back in line
+            print(f"Leaderboard update failed for student {student_id}: {e}")
+
+def cached_response(cache, key, render, max_age=0, public=True, mimetype=None):
+    """Response for a page fully determined by `key`: 304 if the client has it, else cached render"""
+    etag = etag_for(key)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(cache.get_or_render(key, render), mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"{'public' if public else 'private'}, max-age={max_age}"
+    return response
+
 def require_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -67,15 +459,13 @@ def require_auth(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def encrypt_answer(student_id, secret):
-    key = base64.urlsafe_b64encode(hashlib.sha256(secret.encode()).digest())
-    f = Fernet(key)
-    return f.encrypt(str(student_id).encode()).decode()
+def encrypt_answer(student_id, challenge):
+    """CTF flag for a student, in the challenge's flag scheme"""
+    return flag_keys.get(challenge).issue(student_id)
 
-def decrypt_answer(encrypted_answer, secret):
-    key = base64.urlsafe_b64encode(hashlib.sha256(secret.encode()).digest())
-    f = Fernet(key)
-    return int(f.decrypt(encrypted_answer.encode()).decode())
+def verify_answer(submitted_answer, student_id, challenge):
+    """True if the flag belongs to this student; ValueError if it is malformed"""
+    return flag_keys.get(challenge).verify(submitted_answer, student_id)
 
 # Student API Routes
 @app.route('/api/auth/login', methods=['POST'])
@@ -88,9 +478,12 @@ def login():
         return jsonify({'error': 'Username and password required'}), 400
 
     db = get_db()
-    student = db.execute('SELECT * FROM students WHERE name = ?', (username,)).fetchone()
+    try:
+        student = authenticate(db, username, password)
+    except LoginOverloaded:
+        return jsonify({'error': 'Too many logins right now, please retry in a few seconds'}), 503, {'Retry-After': '2'}
 
-    if student and student['hashed_pw'] == hashlib.sha256(password.encode()).hexdigest():
+    if student:
         session['student_id'] = student['id']
         session['student_name'] = student['name']
         return jsonify({'message': 'Login successful', 'student_id': student['id']})
@@ -100,19 +493,19 @@ def login():
 @app.route('/api/challenges')
 @require_auth
 def get_challenges():
-    db = get_db()
-    challenges = db.execute('SELECT id, name, description FROM challenges').fetchall()
-    return jsonify([dict(c) for c in challenges])
+    version, challenges = challenge_catalog.public(get_db)
+    return cached_response(api_cache, ('challenges', version), lambda: app.json.dumps(challenges),
+                           public=False, mimetype='application/json')
 
 @app.route('/api/challenges/<int:challenge_id>')
 @require_auth
 def get_challenge(challenge_id):
-    db = get_db()
-    challenge = db.execute('SELECT id, name, description FROM challenges WHERE id = ?',
-                          (challenge_id,)).fetchone()
+    version, challenges = challenge_catalog.public(get_db)
+    challenge = next((c for c in challenges if c['id'] == challenge_id), None)
     if not challenge:
         return jsonify({'error': 'Challenge not found'}), 404
-    return jsonify(dict(challenge))
+    return cached_response(api_cache, ('challenge', version, challenge_id), lambda: app.json.dumps(challenge),
+                           public=False, mimetype='application/json')
 
 @app.route('/api/challenges/<int:challenge_id>/upload', methods=['POST'])
 @require_auth
@@ -132,7 +525,14 @@ def upload_server_code(challenge_id):
     filepath = os.path.join(temp_dir, filename)
 
     try:
-        file.save(filepath)
+        # Hash while streaming into the store; identical uploads share one blob
+        sha256, size = code_store.save_stream(file.stream)
+        code_store.link(sha256, filepath)
+        db = get_db()
+        db.execute('''INSERT INTO submissions (challenge_id, student_id, filename, sha256, size)
+                     VALUES (?, ?, ?, ?, ?)''',
+                  (challenge_id, student_id, filename, sha256, size))
+        db.commit()
         return jsonify({'message': 'File uploaded successfully', 'filename': filename})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -143,81 +543,68 @@ def start_challenge(challenge_id):
     student_id = session['student_id']
 
     db = get_db()
-    challenge = db.execute('SELECT * FROM challenges WHERE id = ?', (challenge_id,)).fetchone()
+    challenge = challenge_catalog.get(challenge_id, get_db)
     if not challenge:
         return jsonify({'error': 'Challenge not found'}), 404
 
-    # Create CTF answer by encrypting student_id with challenge secret
-    ctf_answer = encrypt_answer(student_id, challenge['secret'])
-
-    # Find available port (simple implementation)
-    import socket
-    sock = socket.socket()
-    sock.bind(('', 0))
-    port = sock.getsockname()[1]
-    sock.close()
-
-    # Store in Redis
-    redis_client.set(f"{student_id}-{challenge_id}", port)
-    redis_client.set(str(port), ctf_answer)
-
-    # Try to find and execute the checked server code
-    checked_dir = os.path.join(os.getcwd(), 'tmp_checked')
-    server_files = []
-    if os.path.exists(checked_dir):
-        for filename in os.listdir(checked_dir):
-            # First try to find student-specific code
-            if filename.startswith(f"{challenge_id}_{student_id}_") and filename.endswith('.py'):
-                server_files.append(filename)
-
-        # If no student-specific code found, look for any approved code for this challenge
-        if not server_files:
-            for filename in os.listdir(checked_dir):
-                if filename.startswith(f"{challenge_id}_") and filename.endswith('.py'):
-                    server_files.append(filename)
-
-    if not server_files:
+    # Most recently approved code: first try the student's own, then any for this challenge
+    submission = db.execute('''SELECT filename, sha256 FROM submissions
+                               WHERE challenge_id = ? AND student_id = ? AND status = 'approved'
+                               ORDER BY approved_at DESC, id DESC LIMIT 1''',
+                            (challenge_id, student_id)).fetchone()
+    if not submission:
+        submission = db.execute('''SELECT filename, sha256 FROM submissions
+                                   WHERE challenge_id = ? AND status = 'approved'
+                                   ORDER BY approved_at DESC, id DESC LIMIT 1''',
+                                (challenge_id,)).fetchone()
+
+    if not submission:
         return jsonify({'error': 'No verified server code available for this challenge. Please wait for admin approval.'}), 400
 
-    # Use the most recent checked upload (by modification time)
-    server_files_with_time = [(f, os.path.getmtime(os.path.join(checked_dir, f))) for f in server_files]
-    server_file = max(server_files_with_time, key=lambda x: x[1])[0]
-    server_path = os.path.join(checked_dir, server_file)
+    server_path = os.path.join(os.getcwd(), 'tmp_checked', submission['filename'])
+    file_hash = submission['sha256']
 
-    try:
-        # Start the server process with correct working directory and Python path
-        env = os.environ.copy()
-        env['PYTHONPATH'] = os.getcwd()  # Add current directory to Python path
-
-        proc = subprocess.Popen([sys.executable, server_path],
-                              stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE,
-                              text=True,
-                              cwd=os.getcwd(),
-                              env=env)
-
-        # Read the port from stdout (server should print it first)
-        actual_port = proc.stdout.readline().strip()
-        if not actual_port.isdigit():
-            proc.terminate()
-            # Debug: show stderr output
-            stderr_output = proc.stderr.read()
-            return jsonify({'error': f'Server failed to start properly. Output: {actual_port}, Error: {stderr_output}'}), 500
-
-        port = int(actual_port)
-
-        # Update Redis with actual port
-        redis_client.set(f"{student_id}-{challenge_id}", port)
-        redis_client.set(str(port), ctf_answer)
+    key = instance_key(student_id, challenge_id)
 
+    # Reuse the running instance unless the approved code or the challenge's flag
+    # settings (secret, scheme) have changed since it started
+    flag_key = flag_digest(challenge)
+    existing = instance_registry.get(key)
+    if existing and instance_registry.is_current(key, existing, file_hash, flag_key):
+        instance_registry.touch(key, existing['port'])
         return jsonify({
-            'message': 'Challenge started successfully',
-            'port': port,
-            'ip': '0.0.0.0'
+            'message': 'Challenge already running',
+            'status': 'running',
+            'port': existing['port'],
+            'ip': '0.0.0.0',
+            'reused': True
         })
 
-    except Exception as e:
-        return jsonify({'error': f'Failed to start server: {str(e)}'}), 500
+    # Create CTF answer by encrypting student_id with challenge secret
+    ctf_answer = encrypt_answer(student_id, challenge)
+
+    # Launch in the background; the page polls the job until the port is ready
+    job_id = launch_jobs.submit(key, student_id, launch_instance, key, server_path, file_hash, ctf_answer, flag_key)
+    return jsonify({
+        'message': 'Challenge is starting',
+        'status': 'queued',
+        'job_id': job_id,
+        'status_url': url_for('get_launch_job', job_id=job_id)
+    }), 202
+
+@app.route('/api/jobs/<job_id>')
+@require_auth
+def get_launch_job(job_id):
+    job = launch_jobs.get(job_id)
+    if not job or job['owner'] != str(session['student_id']):
+        return jsonify({'error': 'Job not found'}), 404
+
+    result = {'job_id': job_id, 'status': job['state']}
+    if job['state'] == 'running':
+        result.update({'port': job['port'], 'ip': '0.0.0.0'})
+    elif job['state'] == 'failed':
+        result['error'] = job.get('error', 'Failed to start server')
+    return jsonify(result)
 
 @app.route('/api/challenges/<int:challenge_id>/submit', methods=['POST'])
 @require_auth
@@ -230,27 +617,29 @@ def submit_answer(challenge_id):
 
     student_id = session['student_id']
 
-    db = get_db()
-    challenge = db.execute('SELECT * FROM challenges WHERE id = ?', (challenge_id,)).fetchone()
+    challenge = challenge_catalog.get(challenge_id, get_db)
     if not challenge:
         return jsonify({'error': 'Challenge not found'}), 404
 
     try:
-        # Decrypt the submitted answer
-        decrypted_student_id = decrypt_answer(submitted_answer, challenge['secret'])
-
-        if decrypted_student_id == student_id:
-            # Mark as solved
-            db.execute('''INSERT OR IGNORE INTO student_challenges
-                         (student_id, challenge_id) VALUES (?, ?)''',
-                      (student_id, challenge_id))
-            db.commit()
-            return jsonify({'message': 'Correct! Challenge solved!'})
-        else:
-            return jsonify({'error': 'Incorrect answer'}), 400
-
+        # Check the flag was issued to this student
+        correct = verify_answer(submitted_answer, student_id, challenge)
     except Exception as e:
         return jsonify({'error': 'Invalid answer format'}), 400
+    if not correct:
+        return jsonify({'error': 'Incorrect answer'}), 400
+
+    # Mark as solved; group-committed with other submissions, returns once durable
+    try:
+        solve_writer.submit(student_id, challenge_id)
+    except (sqlite3.Error, FutureTimeout) as e:
+        print(f"Saving solve {student_id}/{challenge_id} failed: {e}")
+        return jsonify({'error': 'Could not record the solve, please submit again'}), 503
+    # Also when this call did not insert it: a solve committed after an earlier
+    # attempt timed out has not been pushed to the view or leaderboard yet
+    student_views.invalidate(student_id)
+    update_leaderboard(get_db(), student_id)
+    return jsonify({'message': 'Correct! Challenge solved!'})
 
 @app.route('/api/challenges/<int:challenge_id>/status')
 @require_auth
@@ -259,30 +648,44 @@ def get_challenge_status(challenge_id):
 
     db = get_db()
     # Check if already solved
-    solved = db.execute('''SELECT * FROM student_challenges
-                          WHERE student_id = ? AND challenge_id = ?''',
-                       (student_id, challenge_id)).fetchone()
+    solved = db.execute(SOLVED_SQL, (student_id, challenge_id)).fetchone()
 
     if solved:
         return jsonify({'status': 'solved', 'solved_at': solved['solved_at']})
 
     # Check if there's an active session in Redis
-    port = redis_client.get(f"{student_id}-{challenge_id}")
+    key = instance_key(student_id, challenge_id)
+    port = redis_client.get(key)
     if port:
+        instance_registry.touch(key, port)
         return jsonify({'status': 'active', 'port': int(port)})
 
+    if instance_registry.is_expired(key):
+        return jsonify({'status': 'expired'})
+
     return jsonify({'status': 'not_started'})
 
 # Admin Web Interface Routes
 @app.route('/admin')
 def admin_home():
-    return render_template('admin/index.html')
+    return render_template('admin/index.html',
+                         reaper_stats=instance_reaper.stats(),
+                         running_instances=redis_client.zcard(ACTIVITY_KEY))
+
+@app.route('/admin/instances')
+def admin_instances():
+    """Running challenge instances and reaper counters"""
+    return jsonify({
+        'instances': instance_registry.list(),
+        'idle_timeout': instance_reaper.idle_timeout,
+        'reaper': instance_reaper.stats()
+    })
 
 @app.route('/admin/challenges')
 def admin_challenges():
     db = get_db()
     challenges = db.execute('SELECT * FROM challenges ORDER BY id').fetchall()
-    return render_template('admin/challenges.html', challenges=challenges)
+    return render_template('admin/challenges.html', challenges=challenges, delete_report=delete_report_args())
 
 @app.route('/admin/challenges/create', methods=['GET', 'POST'])
 def admin_create_challenge():
@@ -290,14 +693,18 @@ def admin_create_challenge():
         name = request.form['name']
         description = request.form['description']
         secret = request.form['secret'] or secrets.token_urlsafe(32)
+        flag_scheme = request.form.get('flag_scheme', DEFAULT_SCHEME)
+        if flag_scheme not in SCHEMES:
+            return render_template('admin/create_challenge.html', schemes=SCHEMES, error='Unknown flag scheme')
 
         db = get_db()
-        db.execute('INSERT INTO challenges (name, description, secret) VALUES (?, ?, ?)',
-                  (name, description, secret))
+        db.execute('INSERT INTO challenges (name, description, secret, flag_scheme) VALUES (?, ?, ?, ?)',
+                  (name, description, secret, flag_scheme))
         db.commit()
+        challenge_catalog.bump()
         return redirect(url_for('admin_challenges'))
 
-    return render_template('admin/create_challenge.html')
+    return render_template('admin/create_challenge.html', schemes=SCHEMES)
 
 @app.route('/admin/challenges/<int:challenge_id>/edit', methods=['GET', 'POST'])
 def admin_edit_challenge(challenge_id):
@@ -306,34 +713,132 @@ def admin_edit_challenge(challenge_id):
         name = request.form['name']
         description = request.form['description']
         secret = request.form['secret']
-
-        db.execute('UPDATE challenges SET name = ?, description = ?, secret = ? WHERE id = ?',
-                  (name, description, secret, challenge_id))
+        flag_scheme = request.form.get('flag_scheme', DEFAULT_SCHEME)
+        if flag_scheme not in SCHEMES:
+            challenge = db.execute(CHALLENGE_BY_ID_SQL, (challenge_id,)).fetchone()
+            return render_template('admin/edit_challenge.html', challenge=challenge, schemes=SCHEMES,
+                                   error='Unknown flag scheme')
+
+        db.execute('UPDATE challenges SET name = ?, description = ?, secret = ?, flag_scheme = ? WHERE id = ?',
+                  (name, description, secret, flag_scheme, challenge_id))
         db.commit()
+        flag_keys.invalidate(challenge_id)
+        challenge_catalog.bump()
         return redirect(url_for('admin_challenges'))
 
-    challenge = db.execute('SELECT * FROM challenges WHERE id = ?', (challenge_id,)).fetchone()
-    return render_template('admin/edit_challenge.html', challenge=challenge)
+    challenge = db.execute(CHALLENGE_BY_ID_SQL, (challenge_id,)).fetchone()
+    return render_template('admin/edit_challenge.html', challenge=challenge, schemes=SCHEMES)
+
+DELETE_REPORT_FIELDS = ('students', 'challenges', 'solves', 'submissions', 'files', 'instances', 'redis_keys')
+ID_LIST = 'IN (SELECT value FROM json_each(?))'  # one JSON array parameter, any number of ids
+
+def delete_cascade(db, student_ids=(), challenge_ids=()):
+    """Delete students and/or challenges and everything that depends on them.
+
+    All rows go in one transaction; then the affected instances are torn down
+    as one batch and their leftover Redis keys deleted in one pipeline.
+    Returns the counts for DELETE_REPORT_FIELDS.
+    """
+    student_ids = [int(i) for i in student_ids]
+    challenge_ids = [int(i) for i in challenge_ids]
+    ids = (json.dumps(student_ids), json.dumps(challenge_ids))
+    affected = f'student_id {ID_LIST} OR challenge_id {ID_LIST}'
+
+    names = [row['name'] for row in db.execute(f'SELECT name FROM students WHERE id {ID_LIST}', ids[:1])]
+    all_students = [row['id'] for row in db.execute('SELECT id FROM students')] if challenge_ids else []
+    all_challenges = [row['id'] for row in db.execute('SELECT id FROM challenges')] if student_ids else []
+    uploads = db.execute(f'SELECT filename, sha256, status FROM submissions WHERE {affected}', ids).fetchall()
+
+    report = dict.fromkeys(DELETE_REPORT_FIELDS, 0)
+    report['submissions'] = db.execute(f'DELETE FROM submissions WHERE {affected}', ids).rowcount
+    report['solves'] = db.execute(f'DELETE FROM student_challenges WHERE {affected}', ids).rowcount
+    report['students'] = db.execute(f'DELETE FROM students WHERE id {ID_LIST}', ids[:1]).rowcount
+    report['challenges'] = db.execute(f'DELETE FROM challenges WHERE id {ID_LIST}', ids[1:]).rowcount
+    db.commit()
+
+    # Uploaded files, and their blobs once nothing left refers to them
+    for upload in uploads:
+        directory = {'pending': 'tmp', 'approved': 'tmp_checked'}.get(upload['status'])
+        if directory:
+            try:
+                os.remove(os.path.join(os.getcwd(), directory, upload['filename']))
+                report['files'] += 1
+            except FileNotFoundError:
+                pass
+    for sha256 in {upload['sha256'] for upload in uploads}:
+        if not db.execute("SELECT 1 FROM submissions WHERE sha256 = ? AND status IN ('pending', 'approved') LIMIT 1",
+                          (sha256,)).fetchone():
+            code_store.remove(sha256)
+
+    # Running instances of any (student, challenge) pair involved
+    gone_students, gone_challenges = set(map(str, student_ids)), set(map(str, challenge_ids))
+    running = [key for key in redis_client.zrange(ACTIVITY_KEY, 0, -1)
+               if key.split('-', 1)[0] in gone_students or key.split('-', 1)[-1] in gone_challenges]
+    report['instances'] = instance_registry.stop_many(running)
+
+    # Port mappings, expiry markers and launch locks of instances not running, plus page caches
+    pairs = {(s, c) for s in student_ids for c in all_challenges}
+    pairs.update((s, c) for s in all_students for c in challenge_ids)
+    keys = [prefix + instance_key(s, c) for s, c in pairs for prefix in ('', EXPIRED_PREFIX, ACTIVE_PREFIX)]
+    keys += [STUDENT_PREFIX + str(s) + suffix for s in (all_students or student_ids) for suffix in ('', ':gen')]
+    pipe = redis_client.pipeline(transaction=False)
+    for start in range(0, len(keys), 1000):
+        pipe.delete(*keys[start:start + 1000])
+    report['redis_keys'] = sum(pipe.execute())
+
+    if names:
+        try:
+            leaderboard.remove(*names)
+        except redis.RedisError as e:
+            # The rows are gone; `python leaderboard.py rebuild` drops the stale entries
+            print(f"Leaderboard update failed for deleted students {names}: {e}")
+    for challenge_id in challenge_ids:
+        flag_keys.invalidate(challenge_id)
+    if challenge_ids:
+        challenge_catalog.bump()
+        rebuild_leaderboard(db)  # everyone who solved the challenge lost a point
+    return report
+
+def delete_report_args():
+    """Counts from a delete_cascade redirect, or None"""
+    report = {field: request.args.get(f'deleted_{field}', type=int) for field in DELETE_REPORT_FIELDS}
+    return report if report['students'] is not None else None
+
+def redirect_with_delete_report(endpoint, report):
+    return redirect(url_for(endpoint, **{f'deleted_{field}': count for field, count in report.items()}))
 
 @app.route('/admin/challenges/<int:challenge_id>/delete', methods=['POST'])
 def admin_delete_challenge(challenge_id):
-    db = get_db()
-    db.execute('DELETE FROM challenges WHERE id = ?', (challenge_id,))
-    db.commit()
-    return redirect(url_for('admin_challenges'))
+    report = delete_cascade(get_db(), challenge_ids=[challenge_id])
+    return redirect_with_delete_report('admin_challenges', report)
+
+def admin_list_args():
+    """(after, search, limit) from the query string of an admin list"""
+    limit = request.args.get('limit', app.config['ADMIN_PAGE_SIZE'], type=int)
+    return request.args.get('after'), request.args.get('q', '').strip(), max(1, min(limit, 500))
 
 @app.route('/admin/students')
 def admin_students():
-    db = get_db()
-    students = db.execute('SELECT * FROM students ORDER BY id').fetchall()
-    return render_template('admin/students.html', students=students)
+    after, search, limit = admin_list_args()
+    students, next_cursor = student_page(get_db(), after, search, limit)
+    import_report = {name: request.args.get(name) for name in ('inserted', 'skipped', 'seconds', 'header')}
+    return render_template('admin/students.html', students=students, next_cursor=next_cursor, search=search,
+                           import_report=import_report if import_report['inserted'] is not None else None,
+                           delete_report=delete_report_args())
+
+@app.route('/admin/api/students')
+def admin_api_students():
+    """One page of students; `after` is the previous page's `next`"""
+    after, search, limit = admin_list_args()
+    students, next_cursor = student_page(get_db(), after, search, limit)
+    return jsonify({'students': students, 'next': next_cursor})
 
 @app.route('/admin/students/create', methods=['GET', 'POST'])
 def admin_create_student():
     if request.method == 'POST':
         name = request.form['name']
         password = request.form['password']
-        hashed_pw = hashlib.sha256(password.encode()).hexdigest()
+        hashed_pw = hash_password(password)
 
         db = get_db()
         try:
@@ -341,6 +846,11 @@ def admin_create_student():
             db.commit()
         except sqlite3.IntegrityError:
             return render_template('admin/create_student.html', error='Student name already exists')
+        try:
+            leaderboard.update(name, 0, None)
+        except redis.RedisError as e:
+            # The student is saved; `python leaderboard.py rebuild` brings the board back in line
+            print(f"Leaderboard update failed for new student {name}: {e}")
         return redirect(url_for('admin_students'))
 
     return render_template('admin/create_student.html')
@@ -354,89 +864,124 @@ def admin_import_students():
     if file.filename == '':
         return redirect(url_for('admin_students'))
 
-    content = file.read().decode('utf-8')
-    lines = content.strip().split('\n')
-
+    # Streamed and hashed in worker processes, then inserted in one short transaction
     db = get_db()
-    imported = 0
-    for line in lines:
-        if ',' in line:
-            name, password = line.strip().split(',', 1)
-            hashed_pw = hashlib.sha256(password.encode()).hexdigest()
-            try:
-                db.execute('INSERT INTO students (name, hashed_pw) VALUES (?, ?)', (name, hashed_pw))
-                imported += 1
-            except sqlite3.IntegrityError:
-                continue  # Skip duplicates
-
+    pool = get_hash_pool()
+    try:
+        report = import_students(db, file.stream, pool=pool, skip_header=bool(request.form.get('skip_header')))
+    except BrokenProcessPool:
+        # A hashing worker died (e.g. killed for memory); nothing was inserted
+        db.rollback()
+        discard_hash_pool(pool)
+        return jsonify({'error': 'Password hashing workers crashed, please retry the import'}), 503, {'Retry-After': '2'}
     db.commit()
-    return redirect(url_for('admin_students'))
+    if report['inserted']:
+        rebuild_leaderboard(db)
+    return redirect(url_for('admin_students', **report))
 
 @app.route('/admin/students/bulk_delete', methods=['POST'])
 def admin_bulk_delete_students():
     student_ids = request.form.getlist('student_ids')
-    if student_ids:
-        db = get_db()
-        placeholders = ','.join(['?'] * len(student_ids))
-        db.execute(f'DELETE FROM students WHERE id IN ({placeholders})', student_ids)
-        db.commit()
-    return redirect(url_for('admin_students'))
+    if not student_ids:
+        return redirect(url_for('admin_students'))
+    if not all(i.isdigit() for i in student_ids):
+        flash('Invalid student selection, nothing was deleted', 'danger')
+        return redirect(url_for('admin_students'))
+    report = delete_cascade(get_db(), student_ids=student_ids)
+    return redirect_with_delete_report('admin_students', report)
+
+@app.route('/admin/instances/<key>/log')
+def admin_instance_log(key):
+    """Tail of a challenge instance's stdout/stderr"""
+    lines = min(request.args.get('lines', 200, type=int), 5000)
+    return jsonify({'key': key, 'lines': instance_logs.tail(key, lines)})
 
 @app.route('/admin/server_codes')
 def admin_server_codes():
     """Admin interface to manage server codes"""
-    tmp_dir = os.path.join(os.getcwd(), 'tmp')
-    checked_dir = os.path.join(os.getcwd(), 'tmp_checked')
-
-    # Get files from tmp directory (pending approval)
-    pending_files = []
-    if os.path.exists(tmp_dir):
-        for filename in os.listdir(tmp_dir):
-            if filename.endswith('.py'):
-                filepath = os.path.join(tmp_dir, filename)
-                file_stat = os.stat(filepath)
-                pending_files.append({
-                    'filename': filename,
-                    'size': file_stat.st_size,
-                    'modified': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                })
-
-    # Get files from tmp_checked directory (approved)
-    approved_files = []
-    if os.path.exists(checked_dir):
-        for filename in os.listdir(checked_dir):
-            if filename.endswith('.py'):
-                filepath = os.path.join(checked_dir, filename)
-                file_stat = os.stat(filepath)
-                approved_files.append({
-                    'filename': filename,
-                    'size': file_stat.st_size,
-                    'modified': datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                })
+    db = get_db()
+    _, search, limit = admin_list_args()
+    challenge_id = request.args.get('challenge', type=int)
+
+    # First page of pending (in tmp/) and approved (in tmp_checked/); the rest load from the API
+    pending_files, pending_next = submission_page(db, 'pending', None, challenge_id, search, limit)
+    approved_files, approved_next = submission_page(db, 'approved', None, challenge_id, search, limit)
 
     return render_template('admin/server_codes.html',
                          pending_files=pending_files,
-                         approved_files=approved_files)
+                         approved_files=approved_files,
+                         pending_next=pending_next,
+                         approved_next=approved_next,
+                         pending_total=count_submissions(db, 'pending'),
+                         approved_total=count_submissions(db, 'approved'),
+                         challenges=challenge_catalog.public(get_db)[1],
+                         challenge_id=challenge_id,
+                         search=search)
+
+@app.route('/admin/api/server_codes')
+def admin_api_server_codes():
+    """One page of pending or approved uploads; `after` is the previous page's `next`"""
+    status = request.args.get('status', 'pending')
+    if status not in ('pending', 'approved'):
+        return jsonify({'error': 'status must be pending or approved'}), 400
+    after, search, limit = admin_list_args()
+    files, next_cursor = submission_page(get_db(), status, after, request.args.get('challenge', type=int),
+                                         search, limit)
+    return jsonify({'files': files, 'next': next_cursor})
+
+def approve_submission(db, filename, sha256):
+    """Precompile a pending upload and move it from tmp to tmp_checked"""
+    tmp_path = os.path.join(os.getcwd(), 'tmp', filename)
+    checked_path = os.path.join(os.getcwd(), 'tmp_checked', filename)
+
+    # Tracebacks name the file where it is about to be moved, not tmp/
+    code_store.compile(sha256, source=tmp_path, dfile=checked_path)
+    # Same inode, new directory: no copy of the content
+    os.replace(tmp_path, checked_path)
+    db.execute('''UPDATE submissions SET status = 'approved', approved_at = CURRENT_TIMESTAMP
+                 WHERE filename = ?''', (filename,))
 
 @app.route('/admin/server_codes/approve/<filename>', methods=['POST'])
 def admin_approve_server_code(filename):
     """Move a server code from tmp to tmp_checked (approve it)"""
     tmp_path = os.path.join(os.getcwd(), 'tmp', filename)
-    checked_path = os.path.join(os.getcwd(), 'tmp_checked', filename)
 
-    if not os.path.exists(tmp_path):
+    db = get_db()
+    submission = db.execute("SELECT sha256 FROM submissions WHERE filename = ? AND status = 'pending'",
+                            (filename,)).fetchone()
+    if not submission or not os.path.exists(tmp_path):
         return jsonify({'error': 'File not found'}), 404
 
     try:
-        # Copy file to checked directory
-        import shutil
-        shutil.copy2(tmp_path, checked_path)
-        # Remove from tmp directory
-        os.remove(tmp_path)
+        approve_submission(db, filename, submission['sha256'])
+        db.commit()
         return jsonify({'message': 'Server code approved successfully'})
+    except py_compile.PyCompileError as e:
+        return jsonify({'error': f'Server code does not compile: {e.msg}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/admin/server_codes/approve_hash/<sha256>', methods=['POST'])
+def admin_approve_server_code_hash(sha256):
+    """Approve every pending upload with this exact content"""
+    db = get_db()
+    submissions = db.execute("SELECT filename FROM submissions WHERE sha256 = ? AND status = 'pending'",
+                             (sha256,)).fetchall()
+    if not submissions:
+        return jsonify({'error': 'No pending submissions with this hash'}), 404
+
+    try:
+        for submission in submissions:
+            approve_submission(db, submission['filename'], sha256)
+        db.commit()
+        return jsonify({'message': f'Approved {len(submissions)} submissions', 'approved': len(submissions)})
+    except py_compile.PyCompileError as e:
+        db.rollback()
+        return jsonify({'error': f'Server code does not compile: {e.msg}'}), 400
+    except Exception as e:
+        db.commit()  # keep the ones already moved to tmp_checked in sync with the catalog
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/admin/server_codes/reject/<filename>', methods=['POST'])
 def admin_reject_server_code(filename):
     """Remove a server code from tmp (reject it)"""
@@ -447,6 +992,18 @@ def admin_reject_server_code(filename):
 
     try:
         os.remove(tmp_path)
+        db = get_db()
+        db.execute("UPDATE submissions SET status = 'rejected' WHERE filename = ?", (filename,))
+        db.commit()
+
+        # Drop the blob once no pending or approved submission uses it
+        submission = db.execute('SELECT sha256 FROM submissions WHERE filename = ?', (filename,)).fetchone()
+        if submission:
+            in_use = db.execute('''SELECT 1 FROM submissions
+                                  WHERE sha256 = ? AND status IN ('pending', 'approved') LIMIT 1''',
+                               (submission['sha256'],)).fetchone()
+            if not in_use:
+                code_store.remove(submission['sha256'])
         return jsonify({'message': 'Server code rejected successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -490,9 +1047,13 @@ def student_home():
         password = request.form['password']
 
         db = get_db()
-        student = db.execute('SELECT * FROM students WHERE name = ?', (username,)).fetchone()
+        try:
+            student = authenticate(db, username, password)
+        except LoginOverloaded:
+            return render_template('student/login.html',
+                                   error='Too many logins right now, please retry in a few seconds'), 503, {'Retry-After': '2'}
 
-        if student and student['hashed_pw'] == hashlib.sha256(password.encode()).hexdigest():
+        if student:
             session['student_id'] = student['id']
             session['student_name'] = student['name']
             return redirect(url_for('student_dashboard'))
@@ -510,9 +1071,13 @@ def student_login():
         password = request.form['password']
 
         db = get_db()
-        student = db.execute('SELECT * FROM students WHERE name = ?', (username,)).fetchone()
+        try:
+            student = authenticate(db, username, password)
+        except LoginOverloaded:
+            return render_template('student/login.html',
+                                   error='Too many logins right now, please retry in a few seconds'), 503, {'Retry-After': '2'}
 
-        if student and student['hashed_pw'] == hashlib.sha256(password.encode()).hexdigest():
+        if student:
             session['student_id'] = student['id']
             session['student_name'] = student['name']
             return redirect(url_for('student_dashboard'))
@@ -524,36 +1089,30 @@ def student_login():
 @app.route('/student/dashboard')
 @require_auth
 def student_dashboard():
-    db = get_db()
-    challenges = db.execute('SELECT * FROM challenges ORDER BY id').fetchall()
-
-    # Get solved challenges for this student
-    solved_challenges = db.execute('''
-        SELECT challenge_id FROM student_challenges WHERE student_id = ?
-    ''', (session['student_id'],)).fetchall()
-
-    solved_ids = [c['challenge_id'] for c in solved_challenges]
+    # Challenge list and solved set from the view cache (SQLite only on a miss)
+    view = student_views.get(session['student_id'], get_db)
 
     return render_template('student/dashboard.html',
-                         challenges=challenges,
-                         solved_ids=solved_ids)
+                         challenges=view['challenges'],
+                         solved_ids=view['solved'])
 
 @app.route('/student/challenge/<int:challenge_id>')
 @require_auth
 def student_challenge(challenge_id):
-    db = get_db()
-    challenge = db.execute('SELECT * FROM challenges WHERE id = ?', (challenge_id,)).fetchone()
+    view = student_views.get(session['student_id'], get_db)
+    challenge = next((c for c in view['challenges'] if c['id'] == challenge_id), None)
 
     if not challenge:
         return render_template('error.html', message='Challenge not found'), 404
 
     # Check if already solved
-    solved = db.execute('''
-        SELECT * FROM student_challenges WHERE student_id = ? AND challenge_id = ?
-    ''', (session['student_id'], challenge_id)).fetchone()
+    solved_at = view['solved'].get(challenge_id)
+    solved = {'solved_at': solved_at} if solved_at else None
 
     # Check if there's an active session
-    port = redis_client.get(f"{session['student_id']}-{challenge_id}")
+    port = view['ports'].get(challenge_id)
+    if port:
+        instance_registry.touch(instance_key(session['student_id'], challenge_id), port)
 
     return render_template('student/challenge.html',
                          challenge=challenge,
@@ -569,25 +1128,44 @@ def student_logout():
 def public_ranking():
     """Public ranking page showing student progress"""
     db = get_db()
-
-    # Get ranking data - students with their solved challenge counts
-    ranking_data = db.execute('''
-        SELECT
-            s.name,
-            COUNT(sc.challenge_id) as solved_count,
-            MAX(sc.solved_at) as last_solved
-        FROM students s
-        LEFT JOIN student_challenges sc ON s.id = sc.student_id
-        GROUP BY s.id, s.name
-        ORDER BY solved_count DESC, last_solved ASC
-    ''').fetchall()
+    page_size = app.config['RANKING_PAGE_SIZE']
+    # A malformed cursor shows the first page (and shares its cache entry)
+    after = request.args.get('after') if valid_cursor(request.args.get('after')) else None
+    before = request.args.get('before') if valid_cursor(request.args.get('before')) else None
 
     # Get total number of challenges
     total_challenges = db.execute('SELECT COUNT(*) as count FROM challenges').fetchone()['count']
 
-    return render_template('ranking.html',
-                         ranking_data=ranking_data,
-                         total_challenges=total_challenges)
+    # Pages come from the Redis sorted set (rebuilt from SQLite if it is missing) and are
+    # rendered once per leaderboard version; unchanged pages are answered with 304
+    try:
+        if not leaderboard.exists():
+            leaderboard.rebuild(db)
+        version = leaderboard.version()
+    except redis.RedisError:
+        ranking_data = [dict(row, rank=rank) for rank, row in
+                        enumerate(db.execute(RANKING_SQL, (page_size,)).fetchall(), start=1)]
+        total_students, active_students = db.execute(
+            'SELECT COUNT(*), COUNT(*) FILTER (WHERE solved_count > 0) FROM students').fetchone()
+        return render_template('ranking.html',
+                             ranking_data=ranking_data,
+                             total_challenges=total_challenges,
+                             total_students=total_students,
+                             active_students=active_students)
+
+    def render():
+        ranking_data, prev_cursor, next_cursor = leaderboard.page(page_size, after=after, before=before)
+        total_students, active_students = leaderboard.counts()
+        return render_template('ranking.html',
+                             ranking_data=ranking_data,
+                             total_challenges=total_challenges,
+                             total_students=total_students,
+                             active_students=active_students,
+                             prev_cursor=prev_cursor,
+                             next_cursor=next_cursor)
+
+    return cached_response(ranking_cache, ('ranking', version, total_challenges, after, before),
+                           render, max_age=app.config['RANKING_MAX_AGE'])
 
 if __name__ == '__main__':
     temp_dir = os.path.join(os.getcwd(), 'tmp')
@@ -596,6 +1174,7 @@ if __name__ == '__main__':
     tmp_checked_dir = os.path.join(os.getcwd(), 'tmp_checked')
     os.makedirs(tmp_checked_dir, exist_ok=True)
     init_db()
+    start_background_services()  # warm interpreters before the first click, start the reaper
 
     # Configure Flask to exclude tmp directory from auto-reload
     import sys
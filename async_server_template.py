@@ -0,0 +1,12 @@
+# server.py (asyncio version of server_template.py)
+from async_server_utils import run
+
+# CHANGE THIS FUNCTION TO IMPLEMENT YOUR SERVER LOGIC
+# reader: await reader.readline() / reader.readexactly(n) / read_frame(reader)
+# writer: writer.write(data); await writer.drain()
+async def handle_client(reader, writer, expected_answer: str) -> None:
+    return
+
+if __name__ == "__main__":
+    # Binds the platform's port, prints it and serves every client in one thread
+    run(handle_client, max_connections=1000, read_timeout=30)
@@ -0,0 +1,242 @@
+"""
+Asyncio helpers for challenge servers.
+
+One event loop thread serves every connection, so a server written against
+this module handles thousands of clients without a thread per connection:
+
+    from async_server_utils import run, read_frame, write_frame
+
+    async def handle_client(reader, writer, expected_answer):
+        writer.write(b"3 + 5 = ?\\n")
+        await writer.drain()
+        line = await reader.readline()
+        ...
+
+    if __name__ == "__main__":
+        run(handle_client)
+
+run() binds the leased port, prints it (as the platform requires), fetches
+the answer with server_utils.get_ctf_answer() and calls handle_client for
+every connection.  Reads fill a preallocated buffer with recv_into and fail
+with asyncio.TimeoutError after `read_timeout` seconds; at most
+`max_connections` clients are served at once, further ones wait in the
+listen backlog.
+
+reader/writer implement the subset of asyncio.StreamReader/StreamWriter used
+above (readline, readexactly, read, write, drain, close, wait_closed,
+get_extra_info), so the same handle_client also runs in gateway mode, where
+the gateway passes real asyncio streams.
+"""
+
+import asyncio
+import socket
+import struct
+import sys
+
+from server_utils import get_ctf_answer, get_server_port
+
+BUFFER_SIZE = 65536
+MAX_CONNECTIONS = 1000
+READ_TIMEOUT = 30
+MAX_FRAME_SIZE = 1024 * 1024
+FRAME_HEADER = struct.Struct('!I')  # 4-byte big-endian payload length
+
+
+class SocketReader:
+    """Buffered reads on a non-blocking socket into one preallocated buffer"""
+
+    def __init__(self, sock, timeout=READ_TIMEOUT, buffer_size=BUFFER_SIZE):
+        self.sock = sock
+        self.timeout = timeout
+        self._loop = asyncio.get_running_loop()
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._start = 0  # unread data is _buf[_start:_end]
+        self._end = 0
+        self._eof = False
+
+    async def _recv_into(self, view):
+        return await asyncio.wait_for(self._loop.sock_recv_into(self.sock, view), self.timeout)
+
+    async def _fill(self):
+        """Read more data into the buffer; False at EOF"""
+        if self._eof:
+            return False
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buf):
+            # Move unread data to the front to make room
+            size = self._end - self._start
+            self._buf[:size] = self._buf[self._start:self._end]
+            self._start, self._end = 0, size
+        if self._end == len(self._buf):
+            raise ValueError('buffer full')
+        n = await self._recv_into(self._view[self._end:])
+        if n == 0:
+            self._eof = True
+            return False
+        self._end += n
+        return True
+
+    def _take(self, n):
+        data = bytes(self._buf[self._start:self._start + n])
+        self._start += n
+        return data
+
+    async def readline(self):
+        """Bytes up to and including b'\\n' (shorter at EOF, b'' once drained)"""
+        scanned = 0  # unread bytes already searched; _fill() may move the data
+        while True:
+            newline = self._buf.find(b'\n', self._start + scanned, self._end)
+            if newline >= 0:
+                return self._take(newline + 1 - self._start)
+            scanned = self._end - self._start
+            try:
+                more = await self._fill()
+            except ValueError:
+                raise ValueError(f'line longer than {len(self._buf)} bytes')
+            if not more:
+                return self._take(self._end - self._start)
+
+    async def read(self, n=-1):
+        """Up to n bytes (n < 0: whatever is buffered or arrives next); b'' at EOF"""
+        if self._start == self._end and not await self._fill():
+            return b''
+        available = self._end - self._start
+        return self._take(available if n < 0 else min(n, available))
+
+    async def readexactly(self, n):
+        """Exactly n bytes; asyncio.IncompleteReadError if the peer closes first"""
+        buffered = self._end - self._start
+        if n <= buffered:
+            return self._take(n)
+
+        # Copy what is buffered, then receive the rest straight into the result
+        result = bytearray(n)
+        result[:buffered] = self._buf[self._start:self._end]
+        self._start = self._end = 0
+        view = memoryview(result)
+        got = buffered
+        while got < n:
+            received = 0 if self._eof else await self._recv_into(view[got:])
+            if received == 0:
+                self._eof = True
+                raise asyncio.IncompleteReadError(bytes(result[:got]), n)
+            got += received
+        return bytes(result)
+
+    def at_eof(self):
+        return self._eof and self._start == self._end
+
+
+class SocketWriter:
+    def __init__(self, sock):
+        self.sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._pending = []
+
+    def write(self, data):
+        self._pending.append(bytes(data))
+
+    async def drain(self):
+        if self._pending:
+            data = b''.join(self._pending)
+            self._pending.clear()
+            await self._loop.sock_sendall(self.sock, data)
+
+    def get_extra_info(self, name, default=None):
+        if name == 'peername':
+            return self.sock.getpeername()
+        if name == 'socket':
+            return self.sock
+        return default
+
+    def close(self):
+        self.sock.close()
+
+    async def wait_closed(self):
+        return None
+
+
+async def read_frame(reader, max_size=MAX_FRAME_SIZE):
+    """One length-prefixed message; asyncio.IncompleteReadError on a short read"""
+    (size,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if size > max_size:
+        raise ValueError(f'frame of {size} bytes exceeds {max_size}')
+    return await reader.readexactly(size)
+
+
+async def write_frame(writer, payload):
+    """Send one length-prefixed message"""
+    writer.write(FRAME_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def _serve_client(handle_client, conn, addr, expected_answer, read_timeout, slots):
+    try:
+        writer = SocketWriter(conn)
+        try:
+            await handle_client(SocketReader(conn, read_timeout), writer, expected_answer)
+            await writer.drain()
+        except asyncio.TimeoutError:
+            print(f"Client {addr} timed out")
+        except Exception as e:
+            print(f"Error handling client {addr}: {e}")
+        finally:
+            conn.close()
+    finally:
+        slots.release()
+
+
+async def serve(handle_client, host='0.0.0.0', port=None, expected_answer=None,
+                max_connections=MAX_CONNECTIONS, read_timeout=READ_TIMEOUT, backlog=None):
+    """Accept connections forever, running `handle_client` for each one.
+
+    `backlog` is the listen() queue length (default: max_connections, capped
+    by the kernel's SOMAXCONN).
+    """
+    if port is None:
+        port = get_server_port()  # Port assigned by the platform (0 when run by hand)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    port = sock.getsockname()[1]
+    sock.listen(backlog if backlog is not None else min(max_connections, socket.SOMAXCONN))
+    sock.setblocking(False)
+
+    # Print port on first line (required by system)
+    print(port)
+    sys.stdout.flush()
+
+    if expected_answer is None:
+        expected_answer = get_ctf_answer(port)
+
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max_connections)
+    tasks = set()
+    try:
+        while True:
+            await slots.acquire()  # at the limit, new clients wait in the backlog
+            try:
+                conn, addr = await loop.sock_accept(sock)
+            except OSError as e:
+                slots.release()
+                print(f"Server error: {e}")
+                await asyncio.sleep(0.1)
+                continue
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            task = asyncio.create_task(
+                _serve_client(handle_client, conn, addr, expected_answer, read_timeout, slots))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        sock.close()
+
+
+def run(handle_client, **options):
+    """Entry point for `if __name__ == "__main__":`; options as for serve()"""
+    try:
+        asyncio.run(serve(handle_client, **options))
+    except KeyboardInterrupt:
+        print("Server shutting down.")
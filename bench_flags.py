@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: flag verification throughput per scheme.
+
+  fernet (uncached)  key derivation + new Fernet object per call, as the
+                     old decrypt_answer did
+  fernet (cached)    FlagKeyCache-held Fernet object
+  hmac   (cached)    HMAC-SHA256 + constant-time compare
+
+Usage: python bench_flags.py [iterations]
+"""
+
+import base64
+import hashlib
+import sys
+import time
+
+from cryptography.fernet import Fernet
+
+from flags import FlagKeyCache
+
+SECRET = 'benchmark-secret'
+STUDENT_ID = 4242
+
+
+def legacy_verify(flag, student_id):
+    key = base64.urlsafe_b64encode(hashlib.sha256(SECRET.encode()).digest())
+    return int(Fernet(key).decrypt(flag.encode()).decode()) == student_id
+
+
+def run(label, verify, flag, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if not verify(flag, STUDENT_ID):
+            raise AssertionError(f'{label}: flag did not verify')
+    elapsed = time.perf_counter() - start
+    print(f"{label:18s} {iterations / elapsed:10.0f} verifications/s "
+          f"({elapsed / iterations * 1e6:6.1f} us each, flag {len(flag)} bytes)")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    cache = FlagKeyCache()
+    fernet = cache.get({'id': 1, 'secret': SECRET, 'flag_scheme': 'fernet'})
+    hmac_scheme = cache.get({'id': 2, 'secret': SECRET, 'flag_scheme': 'hmac'})
+
+    fernet_flag = fernet.issue(STUDENT_ID)
+    run('fernet (uncached)', legacy_verify, fernet_flag, iterations)
+    run('fernet (cached)', fernet.verify, fernet_flag, iterations)
+    run('hmac (cached)', hmac_scheme.verify, hmac_scheme.issue(STUDENT_ID), iterations)
+
+
+if __name__ == '__main__':
+    main()
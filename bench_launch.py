@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: start-to-port-ready latency for cold vs. warm challenge launches.
+
+Cold = subprocess.Popen([python, server.py]) as start_challenge used to do.
+Warm = LauncherPool.launch() on a pre-warmed interpreter.
+"Ready" means the port line was printed and the port accepts connections.
+
+Usage: python bench_launch.py [server_file] [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from launcher import LauncherPool, wait_for_port
+
+
+def read_port(proc):
+    port, _ = wait_for_port(proc, timeout=30)
+    return port
+
+
+def stop(proc):
+    proc.kill()
+    proc.wait()
+
+
+def bench_cold(server_path, runs, env):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, server_path],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                env=env)
+        read_port(proc)
+        timings.append(time.perf_counter() - start)
+        stop(proc)
+    return timings
+
+
+def bench_warm(server_path, runs, env):
+    pool = LauncherPool(size=runs, env=env)
+    deadline = time.time() + 60
+    while pool.idle_count() < runs and time.time() < deadline:
+        time.sleep(0.05)
+
+    timings = []
+    procs = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            proc = pool.launch(server_path)
+            read_port(proc)
+            timings.append(time.perf_counter() - start)
+            procs.append(proc)
+    finally:
+        for proc in procs:
+            stop(proc)
+        pool.close()
+    return timings
+
+
+def report(label, timings):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[max(0, int(len(timings_ms) * 0.95) - 1)]
+    print(f"{label:5s} runs={len(timings_ms):3d} "
+          f"mean={statistics.mean(timings_ms):7.1f}ms "
+          f"median={statistics.median(timings_ms):7.1f}ms "
+          f"p95={p95:7.1f}ms")
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    server_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, 'challenge1_addition_server.py')
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    env = os.environ.copy()
+    env['PYTHONPATH'] = here
+
+    print(f"Launching {server_path} {runs} times\n")
+    report('cold', bench_cold(server_path, runs, env))
+    report('warm', bench_warm(server_path, runs, env))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login throughput and latency with N users logging in at once.
+
+Runs the app in a threaded WSGI server on a scratch database with N scrypt
+accounts, fires N concurrent POST /api/auth/login requests and, while they
+run, times a cheap request (GET /api/challenges, answered 401) to show
+whether logins starve the rest of the app.
+
+  pool    password checks in LOGIN_WORKERS processes, excess shed with 503
+  inline  password checks in the request threads (what a synchronous KDF
+          inside the handler does)
+
+Usage: python bench_login.py [users] [pool|inline]
+"""
+
+import http.client
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import make_server
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    start = time.perf_counter()
+    conn.request(method, path, body=json.dumps(body) if body else None,
+                 headers={'Content-Type': 'application/json'})
+    status = conn.getresponse().status
+    conn.close()
+    return status, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    mode = sys.argv[2] if len(sys.argv) > 2 else 'pool'
+
+    workdir = tempfile.mkdtemp(prefix='ctf-login-')
+    os.chdir(workdir)
+    import app as ctf_app
+    from passwords import LoginVerifier, hash_password
+
+    ctf_app.app.config['DATABASE'] = os.path.join(workdir, 'ctf.db')
+    ctf_app.init_db()
+    if mode == 'inline':
+        ctf_app.login_verifier = LoginVerifier(lambda: ThreadPoolExecutor(max_workers=users),
+                                               max_pending=users, timeout=120)
+
+    print(f"Hashing {users} passwords...")
+    with ThreadPoolExecutor() as pool:  # hashlib.scrypt releases the GIL
+        hashes = list(pool.map(hash_password, [f'pw{i}' for i in range(users)]))
+    db = ctf_app.get_db()
+    db.executemany('INSERT INTO students (name, hashed_pw) VALUES (?, ?)',
+                   [(f'user{i}', hashed) for i, hashed in enumerate(hashes)])
+    db.commit()
+    db.close()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, ctf_app.app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    request(port, 'POST', '/api/auth/login', {'username': 'user0', 'password': 'pw0'})  # warm workers
+
+    probe_latencies = []
+    done = threading.Event()
+
+    def probe():
+        while not done.is_set():
+            probe_latencies.append(request(port, 'GET', '/api/challenges')[1])
+            time.sleep(0.05)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        results = list(pool.map(lambda i: request(port, 'POST', '/api/auth/login',
+                                                  {'username': f'user{i}', 'password': f'pw{i}'}),
+                                range(users)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+    server.shutdown()
+
+    ok = [latency for status, latency in results if status == 200]
+    shed = sum(1 for status, _ in results if status == 503)
+    print(f"{mode}: {users} concurrent logins in {elapsed:.2f}s "
+          f"({len(ok) / elapsed:.1f} logins/s), ok={len(ok)} shed(503)={shed} "
+          f"other={users - len(ok) - shed}")
+    if ok:
+        print(f"  login latency   p50={statistics.median(ok) * 1000:7.0f}ms "
+              f"p99={percentile(ok, 0.99) * 1000:7.0f}ms")
+    if shed:
+        shed_latencies = [latency for status, latency in results if status == 503]
+        print(f"  503 latency     p50={statistics.median(shed_latencies) * 1000:7.0f}ms")
+    print(f"  other requests  p50={statistics.median(probe_latencies) * 1000:7.1f}ms "
+          f"max={max(probe_latencies) * 1000:7.1f}ms ({len(probe_latencies)} probes)")
+
+
+if __name__ == '__main__':
+    main()
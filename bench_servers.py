@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Load test: connections/sec and latency of a challenge server under parallel
+solvers.
+
+Starts the server, optionally parks some "slow" clients on it that connect
+and never answer, then runs `connections` full solves (read challenge, send
+the answer, read the reply) from `concurrency` client threads.  A solve that
+is refused or takes longer than CLIENT_TIMEOUT counts as failed.
+
+Usage: python bench_servers.py [server_file] [connections] [concurrency] [slow_clients]
+
+Compare the old one-connection-at-a-time server by passing a copy of it, e.g.
+    git show <commit>:challenge1_addition_server.py > /tmp/old_server.py
+"""
+
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from launcher import wait_for_port
+
+CLIENT_TIMEOUT = 5
+CHALLENGE_RE = re.compile(rb'(\d+) ([+*]) (\d+)')
+
+
+def solve(port):
+    """One client session; returns latency in seconds or None on failure"""
+    start = time.perf_counter()
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=CLIENT_TIMEOUT) as sock:
+            challenge = sock.makefile('rb').readline()
+            a, op, b = CHALLENGE_RE.search(challenge).groups()
+            answer = int(a) + int(b) if op == b'+' else int(a) * int(b)
+            sock.sendall(f"{answer}\n".encode())
+            if not sock.recv(1024).startswith(b'Correct'):
+                return None
+    except (OSError, AttributeError):
+        return None
+    return time.perf_counter() - start
+
+
+def park_slow_clients(port, count):
+    """Clients that connect and then never send anything"""
+    sockets = []
+    for _ in range(count):
+        try:
+            sockets.append(socket.create_connection(('127.0.0.1', port), timeout=CLIENT_TIMEOUT))
+        except OSError:
+            pass
+    return sockets
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    server_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, 'challenge1_addition_server.py')
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    slow_clients = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    env = os.environ.copy()
+    env.update(PYTHONPATH=here, CTF_PORT='0', CTF_ANSWER='CTF{benchmark}')
+    proc = subprocess.Popen([sys.executable, server_path], stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, env=env)
+    try:
+        port, _ = wait_for_port(proc, timeout=30)
+        # Keep draining the server's output so it never blocks on a full pipe
+        threading.Thread(target=proc.stdout.read, daemon=True).start()
+        parked = park_slow_clients(port, slow_clients)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(solve, [port] * connections))
+        elapsed = time.perf_counter() - start
+
+        for sock in parked:
+            sock.close()
+    finally:
+        proc.kill()
+        proc.wait()
+
+    latencies_ms = sorted(r * 1000 for r in results if r is not None)
+    failed = connections - len(latencies_ms)
+    print(f"{os.path.basename(server_path)}: {connections} solves, {concurrency} concurrent, "
+          f"{slow_clients} slow clients")
+    print(f"  {len(latencies_ms) / elapsed:8.0f} connections/s  failed={failed}")
+    if latencies_ms:
+        print(f"  p50={percentile(latencies_ms, 0.50):7.1f}ms  "
+              f"p99={percentile(latencies_ms, 0.99):7.1f}ms  "
+              f"max={latencies_ms[-1]:7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
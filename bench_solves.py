@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: solves/sec with many submitters recording solves at once.
+
+Runs on a scratch database with the app's schema and triggers.  `threads`
+submitters each record `per_thread` distinct solves as fast as they can:
+
+  writer       SolveWriter: queued, group-committed, synchronous=FULL
+  inline       INSERT + commit per solve on its own connection (the old
+               submit_answer path, synchronous=NORMAL)
+  inline-full  the same with synchronous=FULL, i.e. as durable as writer
+
+Usage: python bench_solves.py [threads] [per_thread] [writer|inline|inline-full]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    mode = sys.argv[3] if len(sys.argv) > 3 else 'writer'
+
+    workdir = tempfile.mkdtemp(prefix='ctf-solves-')
+    os.chdir(workdir)
+    import app as ctf_app
+    from solvewriter import SolveWriter, INSERT_SQL
+
+    ctf_app.app.config['DATABASE'] = os.path.join(workdir, 'ctf.db')
+    ctf_app.init_db()
+    pool = ctf_app.get_db_pool()
+    db = pool.connect()
+    db.executemany('INSERT INTO students (name, hashed_pw) VALUES (?, ?)',
+                   [(f'user{i}', '-') for i in range(threads)])
+    db.executemany('INSERT INTO challenges (name, secret) VALUES (?, ?)',
+                   [(f'challenge{i}', '-') for i in range(per_thread)])
+    db.commit()
+    student_ids = [row[0] for row in db.execute('SELECT id FROM students ORDER BY id')]
+    challenge_ids = [row[0] for row in db.execute('SELECT id FROM challenges ORDER BY id')]
+
+    writer = SolveWriter(pool.connect, max_batch=ctf_app.app.config['SOLVE_BATCH_SIZE'],
+                         max_delay=ctf_app.app.config['SOLVE_BATCH_WINDOW'])
+
+    def record_inline(conn, student_id, challenge_id):
+        conn.execute(INSERT_SQL, (student_id, challenge_id))
+        conn.commit()
+
+    latencies = []
+    errors = []
+    barrier = threading.Barrier(threads + 1)
+
+    def submitter(student_id):
+        conn = None
+        if mode != 'writer':
+            conn = pool.connect()
+            if mode == 'inline-full':
+                conn.execute('PRAGMA synchronous=FULL')
+        own = []
+        barrier.wait()
+        for challenge_id in challenge_ids:
+            start = time.perf_counter()
+            try:
+                if conn is None:
+                    writer.submit(student_id, challenge_id)
+                else:
+                    record_inline(conn, student_id, challenge_id)
+            except Exception as e:
+                errors.append(e)
+            own.append(time.perf_counter() - start)
+        latencies.extend(own)
+
+    workers = [threading.Thread(target=submitter, args=(student_id,)) for student_id in student_ids]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    recorded = db.execute('SELECT COUNT(*) FROM student_challenges').fetchone()[0]
+    total = threads * per_thread
+    print(f"{mode}: {total} solves from {threads} threads in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} solves/s), recorded={recorded} errors={len(errors)}")
+    print(f"  latency p50={statistics.median(latencies) * 1000:6.1f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:6.1f}ms")
+    if mode == 'writer':
+        print(f"  {writer.batches} commits, {writer.records / max(writer.batches, 1):.1f} solves per commit")
+    if errors:
+        print(f"  first error: {errors[0]!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: web tier throughput, one process vs. prefork workers.
+
+Starts run_production.py on a scratch database with the sample accounts,
+logs one session in per client thread and then, for `seconds`, has every
+thread loop over a mix of logged-in page and API requests on keep-alive
+connections.  Clients run in several processes so the load generator is
+not itself limited to one core.
+
+  workers=1   the previous single-process threaded server
+  workers=N   prefork.py with N worker processes
+
+Usage: python bench_web.py [workers] [client_threads] [seconds] [cookie|redis]
+"""
+
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PATHS = ['/student/dashboard', '/api/challenges', '/ranking', '/api/challenges/1/status']
+ACCOUNTS = [('alice', 'password123'), ('bob', 'password456'), ('charlie', 'password789')]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/ranking')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not come up')
+
+
+def login(conn, username, password):
+    for _ in range(20):
+        conn.request('POST', '/api/auth/login', body=json.dumps({'username': username, 'password': password}),
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 503:  # login workers busy: retry as told
+            break
+        time.sleep(float(response.getheader('Retry-After', 1)))
+    if response.status != 200:
+        raise RuntimeError(f'login failed: {response.status}')
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def client_thread(port, index, start_at, stop_at, results):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    cookie = login(conn, *ACCOUNTS[index % len(ACCOUNTS)])
+    time.sleep(max(0, start_at - time.monotonic()))  # everyone starts together, after the logins
+    latencies, errors = [], 0
+    i = index
+    while time.monotonic() < stop_at:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Cookie': cookie})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    results.append((latencies, errors))
+
+
+def client_process(port, first_index, threads, start_at, stop_at, queue):
+    import threading
+    results = []
+    workers = [threading.Thread(target=client_thread, args=(port, first_index + i, start_at, stop_at, results))
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    queue.put(results)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 2
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    sessions = sys.argv[4] if len(sys.argv) > 4 else 'cookie'
+
+    workdir = tempfile.mkdtemp(prefix='ctf-web-')
+    env = dict(os.environ, PYTHONPATH=HERE, CTF_SESSION_BACKEND=sessions)
+    subprocess.run([sys.executable, '-c', 'import init_data; init_data.init_sample_data()'],
+                   cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, 'run_production.py'),
+                               '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port)],
+                              cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(port)
+        processes = min(threads, os.cpu_count() or 1)
+        per_process = [threads // processes + (1 if i < threads % processes else 0) for i in range(processes)]
+        queue = multiprocessing.Queue()
+        start_at = time.monotonic() + 5  # time for every client to log in
+        stop_at = start_at + seconds
+        clients = []
+        first = 0
+        for count in per_process:
+            clients.append(multiprocessing.Process(target=client_process,
+                                                   args=(port, first, count, start_at, stop_at, queue)))
+            first += count
+        for client in clients:
+            client.start()
+        results = [result for _ in clients for result in queue.get()]
+        for client in clients:
+            client.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = [latency for thread_latencies, _ in results for latency in thread_latencies]
+    errors = sum(thread_errors for _, thread_errors in results)
+    latencies.sort()
+    print(f"workers={workers} sessions={sessions}: {len(latencies)} requests from {threads} clients "
+          f"in {seconds:.0f}s ({len(latencies) / seconds:.0f} req/s), errors={errors}")
+    print(f"  latency p50={statistics.median(latencies) * 1000:6.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:6.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
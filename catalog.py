@@ -0,0 +1,53 @@
+"""
+In-process cache of the challenges table.
+
+Challenges only change when an admin edits them, so each worker process
+keeps every row in memory and reloads the whole (small) table when the
+version counter in Redis moves.  Admin create/edit/delete bump the counter
+after committing, which invalidates the cache in every process at once.
+
+Rows include `secret` and `flag_scheme` for flag checks; public() gives
+the id/name/description view served to students.
+"""
+
+import threading
+
+VERSION_KEY = 'challenges:version'
+PUBLIC_FIELDS = ('id', 'name', 'description')
+
+
+class ChallengeCatalog:
+    def __init__(self, redis_client, version_key=VERSION_KEY):
+        self.redis = redis_client
+        self.version_key = version_key
+        self._version = None
+        self._rows = {}  # id -> dict of the full row
+        self._lock = threading.Lock()
+
+    def version(self):
+        return int(self.redis.get(self.version_key) or 0)
+
+    def bump(self):
+        """Call after committing a change to the challenges table"""
+        self.redis.incr(self.version_key)
+
+    def _current(self, get_db):
+        """(version, rows) reloading from SQLite if another process changed them"""
+        version = self.version()
+        with self._lock:
+            if version == self._version:
+                return version, self._rows
+        # Read after the version, so the rows are at least that new
+        rows = {row['id']: dict(row) for row in get_db().execute('SELECT * FROM challenges ORDER BY id')}
+        with self._lock:
+            self._version, self._rows = version, rows
+        return version, rows
+
+    def get(self, challenge_id, get_db):
+        """Full row (including secret) or None"""
+        return self._current(get_db)[1].get(challenge_id)
+
+    def public(self, get_db):
+        """(version, [{id, name, description}, ...]) in id order"""
+        version, rows = self._current(get_db)
+        return version, [{field: row[field] for field in PUBLIC_FIELDS} for row in rows.values()]
@@ -2,63 +2,55 @@
 """
 Challenge 1: Addition Server
 Server sends 2 numbers, client must calculate the sum, 1 correct answer means pass
+
+Clients are served concurrently from one asyncio event loop, so parallel
+solvers are not refused or stuck behind a slow client.  Tunables (env):
+CTF_BACKLOG (listen queue, default 128), CTF_RECV_TIMEOUT (seconds to wait
+for an answer, default 30).
 """
 
-import socket
 import random
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from async_server_utils import run
 from server_utils import get_ctf_answer
 
-def start_server():
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server_socket.bind(('0.0.0.0', 0))  # Bind to any available port
-    port = server_socket.getsockname()[1]
-
-    # Print port for the main process to read
-    print(port)
-    sys.stdout.flush()
-
-    server_socket.listen(1)
-
-    while True:
-        try:
-            client_socket, address = server_socket.accept()
-            print(f"Connection from {address}")
+BACKLOG = int(os.environ.get('CTF_BACKLOG', 128))
+RECV_TIMEOUT = float(os.environ.get('CTF_RECV_TIMEOUT', 30))
 
-            # Generate two random numbers
-            num1 = random.randint(1, 100)
-            num2 = random.randint(1, 100)
-            expected_sum = num1 + num2
+async def handle_client(reader, writer, expected_answer):
+    print(f"Connection from {writer.get_extra_info('peername')}")
 
-            # Send the challenge
-            message = f"Calculate the sum: {num1} + {num2} = ?\n"
-            client_socket.send(message.encode())
+    # Generate two random numbers
+    num1 = random.randint(1, 100)
+    num2 = random.randint(1, 100)
+    expected_sum = num1 + num2
 
-            # Receive the answer
-            try:
-                response = client_socket.recv(1024).decode().strip()
+    # Send the challenge
+    message = f"Calculate the sum: {num1} + {num2} = ?\n"
+    writer.write(message.encode())
+    await writer.drain()
 
-                if response == str(expected_sum):
-                    # Correct answer - send CTF flag
-                    ctf_answer = get_ctf_answer()
-                    if ctf_answer:
-                        client_socket.send(f"Correct! Here's your flag: {ctf_answer}\n".encode())
-                    else:
-                        client_socket.send("Correct! But couldn't retrieve flag.\n".encode())
-                else:
-                    client_socket.send(f"Wrong! The correct answer was {expected_sum}\n".encode())
+    # Receive the answer (a single read, as before)
+    data = await reader.read(1024)
+    try:
+        response = data.decode().strip()
 
-            except Exception as e:
-                client_socket.send(f"Error processing answer: {e}\n".encode())
+        if response == str(expected_sum):
+            # Correct answer - send CTF flag
+            ctf_answer = expected_answer or get_ctf_answer()
+            if ctf_answer:
+                writer.write(f"Correct! Here's your flag: {ctf_answer}\n".encode())
+            else:
+                writer.write("Correct! But couldn't retrieve flag.\n".encode())
+        else:
+            writer.write(f"Wrong! The correct answer was {expected_sum}\n".encode())
 
-            client_socket.close()
+    except Exception as e:
+        writer.write(f"Error processing answer: {e}\n".encode())
 
-        except Exception as e:
-            print(f"Server error: {e}")
-            continue
+    await writer.drain()
 
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    run(handle_client, backlog=BACKLOG, read_timeout=RECV_TIMEOUT)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the hot read queries.
+
+Builds a scratch database with init_db(), fills it with solves, and fails
+(exit code 1) if a checked query needs a temp B-tree sort or scans a table
+without an index, or if the denormalized students.solved_count/last_solved
+columns disagree with student_challenges.
+
+Usage: python check_query_plans.py [students] [challenges]
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import app as ctf_app
+from adminlists import STUDENTS_SQL, SUBMISSIONS_SQL
+
+# name -> (sql, params, index the plan must use)
+CHECKS = {
+    'ranking': (ctf_app.RANKING_SQL, (100,), 'idx_students_ranking'),
+    'solves per challenge': ('SELECT COUNT(*) FROM student_challenges WHERE challenge_id = ?', (1,),
+                             'idx_student_challenges_challenge'),
+    'solved lookup': (ctf_app.SOLVED_SQL, (1, 1), 'sqlite_autoindex_student_challenges_1'),
+    'admin students page': (STUDENTS_SQL, (500, None, None, 101), 'PRIMARY KEY'),
+    'admin pending page': (SUBMISSIONS_SQL.format(column='uploaded_at'),
+                           ('pending', '2024-01-10', 0, None, None, None, None, None, 101),
+                           'idx_submissions_status'),
+    'admin approved page': (SUBMISSIONS_SQL.format(column='approved_at'),
+                            ('approved', '2024-01-10', 0, 3, 3, '%1%', '%1%', '%1%', 101),
+                            'idx_submissions_approved'),
+}
+
+
+def populate(db, students, challenges):
+    db.executemany('INSERT INTO challenges (name, description, secret) VALUES (?, ?, ?)',
+                   [(f'challenge {i}', '', f'secret{i}') for i in range(challenges)])
+    db.executemany('INSERT INTO students (name, hashed_pw) VALUES (?, ?)',
+                   [(f'student{i}', 'x') for i in range(students)])
+    solves = []
+    for student_id in range(1, students + 1):
+        for challenge_id in random.sample(range(1, challenges + 1), random.randint(0, challenges)):
+            solved_at = f'2024-01-{random.randint(1, 28):02d} {random.randint(0, 23):02d}:00:00'
+            solves.append((student_id, challenge_id, solved_at))
+    db.executemany('INSERT INTO student_challenges (student_id, challenge_id, solved_at) VALUES (?, ?, ?)',
+                   solves)
+    uploads = []
+    for i in range(students * 2):
+        status = random.choice(('pending', 'approved'))
+        uploaded_at = f'2024-01-{random.randint(1, 28):02d} {random.randint(0, 23):02d}:00:00'
+        uploads.append((random.randint(1, challenges), random.randint(1, students), f'upload{i}.py',
+                        f'{random.randrange(students):064x}', 100, status, uploaded_at,
+                        uploaded_at if status == 'approved' else None))
+    db.executemany('''INSERT INTO submissions (challenge_id, student_id, filename, sha256, size, status,
+                                              uploaded_at, approved_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                   uploads)
+    # Unsolving must keep the totals right too
+    db.execute('DELETE FROM student_challenges WHERE id % 7 = 0')
+    db.commit()
+    db.execute('ANALYZE')
+
+
+def plan_problems(db, sql, params, index):
+    plan = [row[3] for row in db.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+    problems = [step for step in plan
+                if 'TEMP B-TREE' in step or (step.startswith('SCAN') and 'INDEX' not in step)]
+    if not any(index in step for step in plan):
+        problems.append(f'does not use {index}')
+    return plan, problems
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    challenges = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    workdir = tempfile.mkdtemp(prefix='ctf-plans-')
+    os.chdir(workdir)  # init_db catalogs tmp/ under the working directory
+    ctf_app.app.config['DATABASE'] = os.path.join(workdir, 'ctf.db')
+    ctf_app.init_db()
+    db = ctf_app.get_db()
+    populate(db, students, challenges)
+
+    failed = False
+    for name, (sql, params, index) in CHECKS.items():
+        plan, problems = plan_problems(db, sql, params, index)
+        print(f"{'FAIL' if problems else 'ok  '} {name}: {' | '.join(plan)}")
+        for problem in problems:
+            print(f"       {problem}")
+        failed = failed or bool(problems)
+
+    mismatched = db.execute('''
+        SELECT COUNT(*) FROM students s
+        WHERE s.solved_count != (SELECT COUNT(*) FROM student_challenges WHERE student_id = s.id)
+           OR s.last_solved IS NOT (SELECT MAX(solved_at) FROM student_challenges WHERE student_id = s.id)
+    ''').fetchone()[0]
+    print(f"{'FAIL' if mismatched else 'ok  '} denormalized solve totals: {mismatched} students out of sync")
+    db.close()
+    return 1 if failed or mismatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Content-addressed storage for uploaded server code.
+
+Uploads are hashed while they are streamed to disk and stored once per
+distinct content:
+
+    blobs/{sha256}.py     the source, shared by every identical upload
+    blobs/{sha256}.pyc    bytecode, compiled once when the code is approved
+
+tmp/{filename} and tmp_checked/{filename} are hard links to the blob, so the
+existing per-submission file names keep working while duplicate uploads
+cost no extra disk space.
+"""
+
+import hashlib
+import os
+import py_compile
+import shutil
+import tempfile
+
+CHUNK_SIZE = 65536
+
+
+class CodeStore:
+    def __init__(self, root):
+        self.root = root
+
+    def source_path(self, sha256):
+        return os.path.join(self.root, f"{sha256}.py")
+
+    def compiled_path(self, sha256):
+        return os.path.join(self.root, f"{sha256}.pyc")
+
+    def save_stream(self, stream):
+        """Stream an upload into the store; returns (sha256, size)"""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            if os.path.exists(self.source_path(sha256)):
+                os.remove(tmp_path)  # duplicate upload: keep the existing blob
+            else:
+                os.replace(tmp_path, self.source_path(sha256))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256, size
+
+    def link(self, sha256, dest):
+        """Expose the blob under a submission file name"""
+        try:
+            os.link(self.source_path(sha256), dest)
+        except OSError:
+            shutil.copyfile(self.source_path(sha256), dest)  # e.g. filesystem without hard links
+
+    def compile(self, sha256, source=None, dfile=None):
+        """Byte-compile an approved source once; raises py_compile.PyCompileError.
+
+        `dfile` is the path tracebacks show (co_filename), e.g. where the
+        source will live once approved.
+        """
+        compiled = self.compiled_path(sha256)
+        if not os.path.exists(compiled):
+            os.makedirs(self.root, exist_ok=True)
+            py_compile.compile(source or self.source_path(sha256), cfile=compiled, dfile=dfile, doraise=True,
+                               invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        return compiled
+
+    def launch_path(self, sha256, fallback):
+        """Bytecode if it was precompiled, else the given source file"""
+        compiled = self.compiled_path(sha256)
+        return compiled if os.path.exists(compiled) else fallback
+
+    def remove(self, sha256):
+        """Drop a blob nobody references any more"""
+        for path in (self.source_path(sha256), self.compiled_path(sha256)):
+            if os.path.exists(path):
+                os.remove(path)
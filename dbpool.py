@@ -0,0 +1,61 @@
+"""
+Reusable SQLite connections for the web app.
+
+Each request borrows one connection (app.get_db caches it on flask.g) and
+hands it back on teardown, so connections and their compiled-statement
+caches survive across requests instead of being opened per call and left
+for the garbage collector.  Connections are opened with:
+
+    journal_mode=WAL     readers no longer block on the submit writer
+    synchronous=NORMAL   durable at checkpoints, safe with WAL
+    busy_timeout         writers wait for the lock instead of failing with
+                         "database is locked"
+
+sqlite3 keeps an LRU of prepared statements per connection keyed by the SQL
+text, so hot queries should use one shared SQL string (see app.py).
+"""
+
+import queue
+import sqlite3
+
+
+class ConnectionPool:
+    def __init__(self, path, size=8, busy_timeout=5.0, cached_statements=256):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def connect(self):
+        """A new connection with the app's pragmas (not pooled)"""
+        conn = sqlite3.connect(self.path,
+                               timeout=self.busy_timeout,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False)  # one request at a time, any thread
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn):
+        """Return a connection; uncommitted work is rolled back"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
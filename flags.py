@@ -0,0 +1,104 @@
+"""
+CTF flag schemes and a per-challenge key cache.
+
+A flag proves "this student solved this challenge".  Two schemes, selectable
+per challenge (challenges.flag_scheme):
+
+  fernet  the original format: Fernet(student_id) under a key derived from
+          the challenge secret (~100 bytes, AES-CBC + HMAC to verify)
+  hmac    CTF{<student_id>-<truncated HMAC-SHA256>}; verifying is one HMAC
+          and one constant-time compare
+
+Deriving keys and building Fernet objects is done once per challenge and
+cached until the secret or scheme changes (admin_edit_challenge also drops
+the entry explicitly).
+"""
+
+import base64
+import hashlib
+import hmac
+import re
+import threading
+
+from cryptography.fernet import Fernet, InvalidToken
+
+DEFAULT_SCHEME = 'fernet'
+HMAC_FLAG_RE = re.compile(r'^CTF\{(\d+)-([A-Za-z0-9_-]{22})\}$')
+
+
+def derive_key(secret):
+    return hashlib.sha256(secret.encode()).digest()
+
+
+def flag_digest(challenge):
+    """Short fingerprint of a challenge's secret and scheme.
+
+    Instances record it at start; one started under other settings holds an
+    answer that no longer verifies and must not be reused.
+    """
+    scheme = challenge['flag_scheme'] or DEFAULT_SCHEME
+    return hashlib.sha256(f"{scheme}\0{challenge['secret']}".encode()).hexdigest()[:16]
+
+
+class FernetScheme:
+    name = 'fernet'
+
+    def __init__(self, secret):
+        self.fernet = Fernet(base64.urlsafe_b64encode(derive_key(secret)))
+
+    def issue(self, student_id):
+        return self.fernet.encrypt(str(student_id).encode()).decode()
+
+    def verify(self, flag, student_id):
+        """True/False for right/wrong student; ValueError if flag is malformed"""
+        try:
+            return int(self.fernet.decrypt(flag.encode()).decode()) == student_id
+        except (InvalidToken, ValueError, UnicodeError):
+            raise ValueError('malformed flag')
+
+
+class HmacScheme:
+    name = 'hmac'
+
+    def __init__(self, secret):
+        self.key = derive_key(secret)
+
+    def _mac(self, student_id):
+        digest = hmac.new(self.key, str(student_id).encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:16]).decode().rstrip('=')
+
+    def issue(self, student_id):
+        return f"CTF{{{student_id}-{self._mac(student_id)}}}"
+
+    def verify(self, flag, student_id):
+        """True/False for right/wrong student; ValueError if flag is malformed"""
+        if not HMAC_FLAG_RE.match(flag):
+            raise ValueError('malformed flag')
+        return hmac.compare_digest(flag.encode(), self.issue(student_id).encode())
+
+
+SCHEMES = {scheme.name: scheme for scheme in (FernetScheme, HmacScheme)}
+
+
+class FlagKeyCache:
+    """challenge_id -> ready-to-use scheme object for the challenge's secret"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, challenge):
+        """Scheme object for a challenges row (needs id, secret, flag_scheme)"""
+        scheme_name = challenge['flag_scheme'] or DEFAULT_SCHEME
+        entry = self._entries.get(challenge['id'])
+        if entry and entry[0] == challenge['secret'] and entry[1] == scheme_name:
+            return entry[2]
+
+        scheme = SCHEMES[scheme_name](challenge['secret'])
+        with self._lock:
+            self._entries[challenge['id']] = (challenge['secret'], scheme_name, scheme)
+        return scheme
+
+    def invalidate(self, challenge_id):
+        with self._lock:
+            self._entries.pop(challenge_id, None)
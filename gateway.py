@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Single-process asyncio gateway hosting many challenge instances.
+
+Instead of one Python process per student, the gateway listens on every
+instance's port itself, imports each approved module once (modules are
+shared between instances that run byte-identical code) and dispatches
+connections to its `handle_client`:
+
+  - `def handle_client(conn, addr, expected_answer)` runs in a thread pool
+    with a regular blocking socket, exactly like the thread-per-connection
+    loop in server_template.py.  The socket times out after CLIENT_TIMEOUT
+    seconds without data and one instance holds at most INSTANCE_THREADS
+    pool threads (further connections wait in its listen queue), so idle
+    clients of one student cannot stall everyone else's instances;
+  - `async def handle_client(reader, writer, expected_answer)` runs on the
+    event loop with asyncio streams.
+
+The web app drives it over a local control socket, one JSON line per
+request and response:
+
+    {"op": "load", "key": "3-1", "path": "...", "port": 20001, "answer": "..."}
+    {"op": "unload", "key": "3-1"}
+    {"op": "list"}
+
+While a handler runs, server_utils.get_ctf_answer() and get_server_port()
+return its instance's answer and port, as they would in a process of its own.
+
+Run with: python gateway.py [control_port]
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from server_utils import serving_instance
+
+DEFAULT_CONTROL_PORT = 5050
+HANDLER_THREADS = 64
+INSTANCE_THREADS = 8
+CLIENT_TIMEOUT = float(os.environ.get('CTF_RECV_TIMEOUT', 30))
+LOAD_TIMEOUT = 10
+
+
+class GatewayError(Exception):
+    pass
+
+
+class Gateway:
+    def __init__(self, handler_threads=HANDLER_THREADS, instance_threads=INSTANCE_THREADS,
+                 client_timeout=CLIENT_TIMEOUT):
+        self.executor = ThreadPoolExecutor(max_workers=handler_threads, thread_name_prefix='handler')
+        self.instance_threads = instance_threads
+        self.client_timeout = client_timeout
+        self.instances = {}  # key -> {'sock', 'task', 'digest', 'port'}
+        self.modules = {}  # sha256 of source -> [module, refcount]
+
+    async def _import(self, path):
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest = hashlib.sha256(source).hexdigest()
+        if digest in self.modules:
+            self.modules[digest][1] += 1
+            return digest, self.modules[digest][0]
+
+        spec = importlib.util.spec_from_file_location(f"ctf_instance_{digest[:16]}", path)
+        module = importlib.util.module_from_spec(spec)
+        loop = asyncio.get_running_loop()
+        # Module top-level code is student code; keep it off the event loop
+        await asyncio.wait_for(loop.run_in_executor(self.executor, spec.loader.exec_module, module),
+                               LOAD_TIMEOUT)
+        if not callable(getattr(module, 'handle_client', None)):
+            raise GatewayError('module does not define handle_client')
+        self.modules[digest] = [module, 1]
+        return digest, module
+
+    def _release_module(self, digest):
+        entry = self.modules.get(digest)
+        if entry:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self.modules[digest]
+
+    async def load(self, key, path, port, answer):
+        if key in self.instances:
+            await self.unload(key)
+
+        digest, module = await self._import(path)
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(('0.0.0.0', port))
+            sock.listen(128)
+            sock.setblocking(False)
+        except OSError:
+            self._release_module(digest)
+            raise
+
+        port = sock.getsockname()[1]
+        task = asyncio.create_task(self._accept_loop(sock, module.handle_client, port, answer))
+        self.instances[key] = {'sock': sock, 'task': task, 'digest': digest, 'port': port}
+        return port
+
+    async def unload(self, key):
+        instance = self.instances.pop(key, None)
+        if instance is None:
+            return False
+        instance['task'].cancel()
+        instance['sock'].close()
+        self._release_module(instance['digest'])
+        return True
+
+    async def _accept_loop(self, sock, handler, port, answer):
+        loop = asyncio.get_running_loop()
+        is_async = inspect.iscoroutinefunction(handler)
+        slots = asyncio.Semaphore(self.instance_threads)
+        while True:
+            if not is_async:
+                await slots.acquire()  # this instance's share of the handler threads
+            try:
+                conn, addr = await loop.sock_accept(sock)
+            except asyncio.CancelledError:
+                raise
+            except OSError as e:
+                print(f"Gateway accept error: {e}")
+                if not is_async:
+                    slots.release()
+                await asyncio.sleep(0.1)
+                continue
+            if is_async:
+                asyncio.create_task(self._run_async(handler, conn, addr, port, answer))
+            else:
+                conn.settimeout(self.client_timeout)  # blocking, but a silent client is dropped
+                future = loop.run_in_executor(self.executor, self._run_blocking,
+                                              handler, conn, addr, port, answer)
+                future.add_done_callback(lambda _: slots.release())
+
+    @staticmethod
+    def _run_blocking(handler, conn, addr, port, answer):
+        try:
+            with serving_instance(port, answer):
+                handler(conn, addr, answer)
+        except Exception as e:
+            print(f"Error handling client {addr}: {e}")
+        finally:
+            conn.close()
+
+    @staticmethod
+    async def _run_async(handler, conn, addr, port, answer):
+        reader, writer = await asyncio.open_connection(sock=conn)
+        try:
+            with serving_instance(port, answer):  # each task runs in its own context copy
+                await handler(reader, writer, answer)
+        except Exception as e:
+            print(f"Error handling client {addr}: {e}")
+        finally:
+            writer.close()
+
+    async def handle_control(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self._dispatch(json.loads(line))
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request):
+        op = request.get('op')
+        if op == 'load':
+            port = await self.load(request['key'], request['path'], int(request['port']), request['answer'])
+            return {'ok': True, 'port': port, 'pid': os.getpid()}
+        if op == 'unload':
+            return {'ok': True, 'unloaded': await self.unload(request['key'])}
+        if op == 'list':
+            return {'ok': True, 'pid': os.getpid(),
+                    'instances': {key: i['port'] for key, i in self.instances.items()},
+                    'modules': len(self.modules)}
+        raise GatewayError(f'unknown op {op!r}')
+
+
+class GatewayClient:
+    """Used by the web app to drive a running gateway"""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_CONTROL_PORT, timeout=LOAD_TIMEOUT + 5):
+        self.address = (host, port)
+        self.timeout = timeout
+
+    def _call(self, **request):
+        with socket.create_connection(self.address, timeout=self.timeout) as sock:
+            sock.sendall((json.dumps(request) + '\n').encode())
+            response = sock.makefile('rb').readline()
+        if not response:
+            raise GatewayError('gateway closed the connection')
+        response = json.loads(response)
+        if not response.get('ok'):
+            raise GatewayError(response.get('error', 'gateway error'))
+        return response
+
+    def load(self, key, path, port, answer):
+        """Host `path` on `port`; returns the gateway's pid"""
+        return self._call(op='load', key=key, path=os.path.abspath(path), port=port, answer=answer)['pid']
+
+    def unload(self, key):
+        return self._call(op='unload', key=key)['unloaded']
+
+    def list(self):
+        return self._call(op='list')
+
+
+async def main(control_port=DEFAULT_CONTROL_PORT):
+    gateway = Gateway()
+    server = await asyncio.start_server(gateway.handle_control, '127.0.0.1', control_port)
+    print(f"Gateway control listening on 127.0.0.1:{control_port} (pid {os.getpid()})")
+    sys.stdout.flush()
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CONTROL_PORT
+    try:
+        asyncio.run(main(port))
+    except KeyboardInterrupt:
+        print("Gateway shutting down.")
@@ -0,0 +1,96 @@
+"""
+Streaming CSV import of student accounts.
+
+The upload is parsed incrementally (line by line over a text wrapper of the
+request stream; only the names and hashes of new accounts are kept) and
+handled in batches:
+
+  1. drop names already in the database or earlier in the file
+  2. hash the remaining passwords in a process pool
+
+Only then are all new accounts inserted with one executemany (INSERT OR
+IGNORE), so the write transaction is opened after the slow hashing and
+holds the database lock for the inserts alone, not for the whole import.
+"""
+
+import io
+import time
+
+from passwords import hash_password
+
+BATCH_SIZE = 500
+
+
+def iter_accounts(stream, skip_header=False):
+    """(name, password) per `name,password` line of a binary stream
+
+    Lines split at the first comma; the password is taken verbatim (commas,
+    quotes and surrounding spaces included), only the line ending is dropped.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+    if skip_header:
+        next(text, None)
+    for line in text:
+        line = line.rstrip('\r\n')
+        if ',' not in line:
+            continue
+        name, password = line.split(',', 1)
+        name = name.strip()
+        if name:
+            yield name, password
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_students(db, stream, pool=None, batch_size=BATCH_SIZE, skip_header=False):
+    """Import accounts from a CSV stream; returns a report dict.
+
+    `pool` is a concurrent.futures executor for hashing (None: hash inline).
+    With `skip_header` the first line is ignored (and the report says so).
+    The caller owns the transaction: commit (or roll back) afterwards.
+    """
+    start = time.perf_counter()
+    rows = 0
+    seen = set()
+    accounts = []  # (name, hash) ready to insert
+    for batch in _batches(iter_accounts(stream, skip_header), batch_size):
+        rows += len(batch)
+        names = [name for name, _ in batch]
+        placeholders = ','.join('?' * len(names))
+        existing = {row[0] for row in
+                    db.execute(f'SELECT name FROM students WHERE name IN ({placeholders})', names)}
+
+        new = []
+        for name, password in batch:
+            if name not in existing and name not in seen:
+                seen.add(name)
+                new.append((name, password))
+        if not new:
+            continue
+
+        passwords = [password for _, password in new]
+        if pool is None:
+            hashes = [hash_password(password) for password in passwords]
+        else:
+            hashes = list(pool.map(hash_password, passwords, chunksize=max(1, len(passwords) // 32)))
+
+        accounts.extend((name, hashed) for (name, _), hashed in zip(new, hashes))
+
+    before = db.total_changes
+    db.executemany('INSERT OR IGNORE INTO students (name, hashed_pw) VALUES (?, ?)', accounts)
+    inserted = db.total_changes - before
+
+    report = {'rows': rows, 'inserted': inserted, 'skipped': rows - inserted,
+              'seconds': round(time.perf_counter() - start, 3)}
+    if skip_header:
+        report['header'] = 'skipped'
+    return report
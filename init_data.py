@@ -1,10 +1,7 @@
-from app import get_db, init_db
-import hashlib
+from app import get_db, init_db, rebuild_leaderboard
+from passwords import hash_password
 import secrets
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
 def init_sample_data():
     init_db()
     db = get_db()
@@ -37,6 +34,7 @@ def init_sample_data():
             pass  # Student already exists
 
     db.commit()
+    rebuild_leaderboard(db)
     db.close()
     print("Sample data initialized successfully!")
 
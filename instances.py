@@ -0,0 +1,268 @@
+"""
+Registry of running challenge instances.
+
+One Redis hash per instance, keyed like the existing port mapping
+("{student_id}-{challenge_id}"):
+
+    instance:{student_id}-{challenge_id} -> {pid, port, file_hash, flag_digest, mode, started_at, last_activity}
+    instances:activity                   -> sorted set of keys scored by last activity
+
+The registry lets start_challenge hand back an instance that is already
+running instead of spawning (and orphaning) a new process on every click,
+and gives the reaper an O(log n) way to find idle instances.  `mode` is
+"process" for a dedicated server process and "gateway" for an instance
+hosted by gateway.py (pid is then the gateway's).  `file_hash` and
+`flag_digest` identify the code and flag settings it was started with;
+an instance is only reused while both are still current.
+
+The public keys ("{student_id}-{challenge_id}" -> port, "{port}" -> answer)
+carry a TTL that is refreshed on activity, so they never outlive an
+instance by more than the idle timeout even if the reaper is not running.
+"""
+
+import hashlib
+import os
+import signal
+import threading
+import time
+
+INSTANCE_PREFIX = 'instance:'
+ACTIVITY_KEY = 'instances:activity'
+EXPIRED_PREFIX = 'expired:'
+EXPIRED_MARKER_TTL = 24 * 3600
+
+
+def instance_key(student_id, challenge_id):
+    return f"{student_id}-{challenge_id}"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def _terminate(proc):
+    """Stop a child we launched and collect its exit status (no zombies)"""
+    if proc.poll() is None:
+        proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except Exception:
+        proc.kill()
+        proc.wait()
+
+
+class InstanceRegistry:
+    def __init__(self, redis_client, ttl=1800, ports=None, gateway=None, on_change=None):
+        self.redis = redis_client
+        self.ttl = ttl  # seconds of inactivity before the public keys expire
+        self.ports = ports  # PortAllocator holding the instances' port leases
+        self.gateway = gateway  # GatewayClient for instances in gateway mode
+        self.on_change = on_change  # called with the key after an instance starts or stops
+        self._procs = {}  # key -> Popen for instances launched by this process
+        self._lock = threading.Lock()
+
+    def lock(self, key, timeout=60):
+        """Serialize start/stop for one instance across workers"""
+        return self.redis.lock(f"lock:{INSTANCE_PREFIX}{key}", timeout=timeout, blocking_timeout=timeout)
+
+    def get(self, key):
+        record = self.redis.hgetall(INSTANCE_PREFIX + key)
+        if not record:
+            return None
+        record['pid'] = int(record['pid'])
+        record['port'] = int(record['port'])
+        record['started_at'] = float(record['started_at'])
+        record['last_activity'] = float(record.get('last_activity', record['started_at']))
+        record.setdefault('mode', 'process')
+        record.setdefault('flag_digest', '')
+        return record
+
+    def is_current(self, key, record, file_hash, flag_digest):
+        """True if the instance runs this code with these flag settings and is alive"""
+        return (record['file_hash'] == file_hash and record['flag_digest'] == flag_digest
+                and self.is_alive(key, record))
+
+    def register(self, key, proc, port, file_hash, ctf_answer, mode='process', pid=None, flag_digest=''):
+        """Record a freshly launched instance and publish its port/answer keys"""
+        now = time.time()
+        record = {
+            'pid': proc.pid if proc is not None else pid,
+            'port': port,
+            'file_hash': file_hash,
+            'flag_digest': flag_digest,
+            'mode': mode,
+            'started_at': now,
+            'last_activity': now,
+        }
+        if proc is not None:
+            with self._lock:
+                self._procs[key] = proc
+
+        pipe = self.redis.pipeline()
+        pipe.hset(INSTANCE_PREFIX + key, mapping=record)
+        pipe.set(key, port, ex=self.ttl)
+        pipe.set(str(port), ctf_answer, ex=self.ttl)
+        pipe.zadd(ACTIVITY_KEY, {key: now})
+        pipe.delete(EXPIRED_PREFIX + key)
+        pipe.execute()
+        if self.on_change:
+            self.on_change(key)
+        return record
+
+    def touch(self, key, port, at=None):
+        """Mark the instance as used (now, or at `at`) and push its key expiry forward"""
+        now = at or time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(INSTANCE_PREFIX + key, 'last_activity', now)
+        pipe.expire(key, self.ttl)
+        pipe.expire(str(port), self.ttl)
+        pipe.zadd(ACTIVITY_KEY, {key: now}, xx=True)
+        pipe.execute()
+        if self.ports:
+            self.ports.renew(port, key)
+
+    def is_alive(self, key, record):
+        with self._lock:
+            proc = self._procs.get(key)
+        if proc is not None and proc.pid == record['pid']:
+            return proc.poll() is None
+        return pid_alive(record['pid'])
+
+    def is_expired(self, key):
+        """True if the instance was reclaimed (or its keys timed out) since the last start"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.exists(EXPIRED_PREFIX + key)
+        pipe.exists(INSTANCE_PREFIX + key)
+        marker, known = pipe.execute()
+        return bool(marker or known)
+
+    def idle_keys(self, cutoff):
+        """Keys whose last activity is older than the cutoff timestamp"""
+        return self.redis.zrangebyscore(ACTIVITY_KEY, '-inf', cutoff)
+
+    def exited_children(self):
+        """Our own children that have exited, as (key, pid)"""
+        exited = []
+        with self._lock:
+            for key, proc in list(self._procs.items()):
+                if proc.poll() is not None:
+                    exited.append((key, proc.pid))
+        return exited
+
+    def drop_handle(self, key, pid):
+        """Forget an exited child without touching the key's current instance"""
+        with self._lock:
+            proc = self._procs.get(key)
+            if proc is None or proc.pid != pid:
+                return
+            del self._procs[key]
+        proc.wait()
+
+    def stop(self, key, record, expired=False):
+        """Terminate the instance process and drop its Redis keys in one transaction"""
+        with self._lock:
+            proc = self._procs.pop(key, None)
+
+        if record['mode'] == 'gateway':
+            try:
+                self.gateway.unload(key)
+            except Exception as e:
+                print(f"Gateway unload failed for {key}: {e}")
+        elif proc is not None and proc.pid == record['pid']:
+            _terminate(proc)
+        elif pid_alive(record['pid']):
+            try:
+                os.kill(record['pid'], signal.SIGTERM)
+            except OSError:
+                pass
+
+        pipe = self.redis.pipeline()
+        pipe.delete(INSTANCE_PREFIX + key, key, str(record['port']))
+        pipe.zrem(ACTIVITY_KEY, key)
+        if expired:
+            pipe.set(EXPIRED_PREFIX + key, int(time.time()), ex=EXPIRED_MARKER_TTL)
+        pipe.execute()
+        if self.ports:
+            self.ports.release(record['port'], key)
+        if self.on_change:
+            self.on_change(key)
+
+    def stop_many(self, keys):
+        """Tear down several instances at once; returns how many were running.
+
+        All processes are signalled before any is waited for, and the Redis
+        keys of the whole batch go in one transaction.
+        """
+        keys = list(keys)
+        if not keys:
+            return 0
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(INSTANCE_PREFIX + key)
+        records = {key: record for key, record in zip(keys, pipe.execute()) if record}
+
+        children = []
+        for key, record in records.items():
+            pid = int(record['pid'])
+            with self._lock:
+                proc = self._procs.pop(key, None)
+            if record.get('mode') == 'gateway':
+                try:
+                    self.gateway.unload(key)
+                except Exception as e:
+                    print(f"Gateway unload failed for {key}: {e}")
+            elif proc is not None and proc.pid == pid:
+                if proc.poll() is None:
+                    proc.terminate()
+                children.append(proc)
+            elif pid_alive(pid):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass
+        for proc in children:
+            _terminate(proc)  # already signalled; this collects the exit status
+
+        pipe = self.redis.pipeline()
+        for key, record in records.items():
+            pipe.delete(INSTANCE_PREFIX + key, key, record['port'])
+        pipe.zrem(ACTIVITY_KEY, *keys)
+        pipe.execute()
+        for key, record in records.items():
+            if self.ports:
+                self.ports.release(record['port'], key)
+            if self.on_change:
+                self.on_change(key)
+        return len(records)
+
+    def forget(self, key):
+        """Drop bookkeeping for an instance whose hash has already gone"""
+        with self._lock:
+            proc = self._procs.pop(key, None)
+        if proc is not None:
+            _terminate(proc)
+        self.redis.zrem(ACTIVITY_KEY, key)
+
+    def list(self):
+        keys = self.redis.zrange(ACTIVITY_KEY, 0, -1)
+        records = []
+        for key in keys:
+            record = self.get(key)
+            if record:
+                record['key'] = key
+                records.append(record)
+        return records
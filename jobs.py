@@ -0,0 +1,97 @@
+"""
+Asynchronous launch jobs for challenge instances.
+
+The start endpoint enqueues a launch and returns a job id straight away;
+a small thread pool runs the launch and records its progress in Redis so
+any web worker can answer the status poll:
+
+    job:{job_id}        -> {state, key, owner, port, error, created_at, updated_at}
+    job:active:{key}    -> job_id of the launch in flight for that instance
+
+States: queued -> starting -> running | failed
+
+A job still queued or starting `stale_after` seconds after its last update
+is taken as lost (the web worker running it died or was restarted): it reads
+as failed, and the next Start for that instance queues a new launch.
+"""
+
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_PREFIX = 'job:'
+ACTIVE_PREFIX = 'job:active:'
+PENDING_STATES = ('queued', 'starting')
+
+
+class LaunchError(Exception):
+    """A launch failed in a way worth showing to the student"""
+
+
+class LaunchJobs:
+    def __init__(self, redis_client, max_workers=8, ttl=3600, stale_after=120):
+        self.redis = redis_client
+        self.ttl = ttl  # how long finished jobs stay queryable
+        self.stale_after = stale_after
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='launch')
+
+    def get(self, job_id):
+        job = self.redis.hgetall(JOB_PREFIX + job_id)
+        if not job:
+            return None
+        job['id'] = job_id
+        if job.get('port'):
+            job['port'] = int(job['port'])
+        if job['state'] in PENDING_STATES and time.time() - float(job['updated_at']) > self.stale_after:
+            job['state'] = 'failed'
+            job['error'] = 'The launch was interrupted, please start the challenge again'
+        return job
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        self.redis.hset(JOB_PREFIX + job_id, mapping=fields)
+
+    def submit(self, key, owner, fn, *args):
+        """Queue fn(*args) as the launch for instance `key`.
+
+        fn must return the port the instance listens on, or raise LaunchError.
+        While a launch for the same key is pending (and not stale) its job id
+        is returned instead of queueing a duplicate.
+        """
+        active_key = ACTIVE_PREFIX + key
+        job_id = secrets.token_hex(8)
+        if not self.redis.set(active_key, job_id, nx=True, ex=self.ttl):
+            current = self.redis.get(active_key)
+            job = self.get(current) if current else None
+            if job and job['state'] in PENDING_STATES:
+                return current
+            self.redis.set(active_key, job_id, ex=self.ttl)
+
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.hset(JOB_PREFIX + job_id, mapping={
+            'state': 'queued',
+            'key': key,
+            'owner': owner,
+            'created_at': now,
+            'updated_at': now,
+        })
+        pipe.expire(JOB_PREFIX + job_id, self.ttl)
+        pipe.execute()
+
+        self.executor.submit(self._run, job_id, key, fn, args)
+        return job_id
+
+    def _run(self, job_id, key, fn, args):
+        self._update(job_id, state='starting')
+        try:
+            port = fn(*args)
+            self._update(job_id, state='running', port=port)
+        except LaunchError as e:
+            self._update(job_id, state='failed', error=str(e))
+        except Exception as e:
+            self._update(job_id, state='failed', error=f'Failed to start server: {e}')
+        finally:
+            # Only clear the marker if a newer job has not replaced it
+            if self.redis.get(ACTIVE_PREFIX + key) == job_id:
+                self.redis.delete(ACTIVE_PREFIX + key)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Pre-warmed interpreter pool for launching challenge servers.
+
+Each worker is a Python process that has already imported the modules every
+challenge server needs (socket, threading, redis, server_utils, ...) and then
+blocks on stdin until it is told which approved file to run.  Starting a
+challenge becomes "write one line to a warm worker" instead of paying full
+interpreter startup and imports on every click.
+
+Protocol (one JSON line on the worker's stdin):
+    {"path": "/abs/path/to/server.py", "env": {"NAME": "value"},
+     "log": "/abs/path/to/instance.log", "log_bytes": 262144}
+
+The worker prints READY_LINE on stdout once its imports are done, so the
+first line the caller reads after launch() is the server's own port line.
+Worker pipes are binary; use wait_for_port() to read that line with a
+deadline instead of blocking on readline().
+
+With "log", the server writes its output to that file itself (a RingLog of
+`log_bytes` per segment, fed from its own fds 1 and 2 by a thread in the
+server process): stderr from the start, stdout after the port line, which
+is the only thing sent through the pipe.  Both pipes are then closed, so a
+running server never depends on a reader in the web worker that launched it
+(that worker may be restarted long before the instance stops).
+"""
+
+import collections
+import json
+import os
+import runpy
+import select
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+from logpump import RingLog
+
+READY_LINE = 'ctf-launcher-ready'
+PRELOAD_MODULES = ['socket', 'threading', 'random', 'typing', 'asyncio', 'redis', 'server_utils',
+                   'async_server_utils']
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+
+def read_line(proc, timeout):
+    """Read the first stdout line of proc within timeout seconds.
+
+    Returns (line, rest) where rest is whatever the process wrote after the
+    newline.  Raises TimeoutError if no full line arrived in time; an empty
+    line means the process closed stdout (usually: it crashed).
+    """
+    fd = proc.stdout.fileno()
+    deadline = time.monotonic() + timeout
+    buf = b''
+    while b'\n' not in buf:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f'no output line within {timeout}s')
+        ready, _, _ = select.select([fd], [], [], remaining)
+        if not ready:
+            continue
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            break
+        buf += chunk
+    line, _, rest = buf.partition(b'\n')
+    return line.decode(errors='replace').strip(), rest
+
+
+TCP_LISTEN = '0A'  # socket state column of /proc/net/tcp
+TCP_ESTABLISHED = '01'
+
+
+def port_has_socket(port, state):
+    """True if a socket on local `port` is in `state`, None without /proc.
+
+    Reads the kernel's socket tables instead of connecting, so checking a
+    server never runs its connection handler.
+    """
+    found = False
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table) as f:
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    if fields[3] == state and int(fields[1].rsplit(':', 1)[1], 16) == port:
+                        return True
+        except FileNotFoundError:
+            continue
+        found = True
+    return False if found else None
+
+
+def port_listening(port):
+    return port_has_socket(port, TCP_LISTEN)
+
+
+def port_connected(port):
+    """True while a client is connected to the server on `port`"""
+    return port_has_socket(port, TCP_ESTABLISHED)
+
+
+def wait_for_port(proc, timeout, host='127.0.0.1'):
+    """Wait until the server printed its port and is listening on it.
+
+    Returns (port, rest_of_stdout).  Raises TimeoutError past the deadline and
+    ValueError if the first line is not a port number.
+    """
+    deadline = time.monotonic() + timeout
+    line, rest = read_line(proc, timeout)
+    if not line.isdigit():
+        raise ValueError(f'expected a port number, got {line!r}')
+    port = int(line)
+
+    # Servers may print the port before calling listen()
+    while True:
+        if proc.poll() is not None:
+            raise ValueError(f'server exited with code {proc.returncode}')
+        listening = port_listening(port)
+        if listening is None:
+            # No /proc (not Linux): fall back to a client connection
+            try:
+                with socket.create_connection((host, port), timeout=0.5):
+                    return port, rest
+            except OSError:
+                pass
+        elif listening:
+            return port, rest
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f'port {port} not listening within {timeout}s')
+        time.sleep(0.02)
+
+
+class _OutputPump:
+    """Drains a server's stdout and stderr into its RingLog.
+
+    fds 1 and 2 become pipes read by a thread of the server process itself,
+    so output written at any level (print, C extensions, child processes)
+    goes through the log's size cap and rotation.  The first stdout line
+    (the port) is passed on to the launcher pipe, which is then closed.
+    """
+
+    def __init__(self, log_path, max_bytes):
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        self.log = RingLog(log_path, max_bytes)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.port_fd = os.dup(1)
+        self._out, out_w = os.pipe()
+        self._err, err_w = os.pipe()
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)  # also closes the launcher's stderr pipe
+        os.close(out_w)
+        os.close(err_w)
+        sys.stdout.reconfigure(line_buffering=True)  # log lines as they are printed
+        self._partial = b''
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        fds = [self._out, self._err]
+        while fds:
+            ready, _, _ = select.select(fds, [], [])
+            for fd in ready:
+                data = os.read(fd, 65536)
+                if not data:
+                    fds.remove(fd)
+                    os.close(fd)
+                    if fd == self._out and self.port_fd is not None:
+                        os.close(self.port_fd)  # no port line: the caller sees EOF
+                        self.port_fd = None
+                    continue
+                if fd == self._out and self.port_fd is not None:
+                    data = self._pass_port_line(data)
+                if data:
+                    self.log.write(data)
+        self.log.close()
+
+    def _pass_port_line(self, data):
+        """Send the first line to the launcher pipe; returns what follows it"""
+        self._partial += data
+        if b'\n' not in self._partial:
+            return b''
+        line, _, rest = self._partial.partition(b'\n')
+        os.write(self.port_fd, line + b'\n')
+        os.close(self.port_fd)  # the caller sees EOF after the port line
+        self.port_fd = None
+        return rest
+
+    def close(self, timeout=2):
+        """Log what is still buffered once the server is done"""
+        sys.stdout.flush()
+        sys.stderr.flush()
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        os.close(devnull)
+        self._thread.join(timeout)
+
+
+def _worker_main():
+    """Body of a pool worker: preload, wait for a request, exec the server"""
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+    print(READY_LINE)
+    sys.stdout.flush()
+
+    line = sys.stdin.readline()
+    if not line:
+        return  # pool shut down before we were used
+
+    request = json.loads(line)
+    os.environ.update(request.get('env') or {})
+
+    # Behave like `python server.py` from here on
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    server_path = request['path']
+    sys.argv = [server_path]
+    sys.path.insert(0, os.path.dirname(server_path))
+    if not request.get('log'):
+        runpy.run_path(server_path, run_name='__main__')
+        return
+
+    output = _OutputPump(request['log'], request.get('log_bytes') or 256 * 1024)
+    try:
+        runpy.run_path(server_path, run_name='__main__')
+    except SystemExit:
+        raise
+    except BaseException:
+        traceback.print_exc()  # while the pump still runs, so it reaches the log
+        sys.exit(1)
+    finally:
+        # Like interpreter exit: let the server's remaining threads finish first
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread() and not thread.daemon:
+                thread.join()
+        output.close()
+
+
+class LauncherPool:
+    """Keeps `size` warm workers ready and refills the pool in the background"""
+
+    def __init__(self, size=4, cwd=None, env=None):
+        self.size = size
+        self.cwd = cwd or os.getcwd()
+        self.env = env
+        self._idle = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+
+    def _spawn(self):
+        """Start a worker and wait until its preloading is done"""
+        proc = subprocess.Popen([sys.executable, WORKER_SCRIPT, '--worker'],
+                                stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                cwd=self.cwd,
+                                env=self.env)
+        try:
+            line, _ = read_line(proc, 30)
+        except TimeoutError:
+            line = ''
+        if line != READY_LINE:
+            proc.kill()
+            proc.wait()
+            raise RuntimeError('Launcher worker failed to start: ' + proc.stderr.read().decode(errors='replace'))
+        return proc
+
+    def _refill_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                return
+
+            while True:
+                with self._lock:
+                    if self._closed or len(self._idle) >= self.size:
+                        break
+                try:
+                    worker = self._spawn()
+                except Exception as e:
+                    print(f"Launcher refill error: {e}")
+                    break
+                with self._lock:
+                    if self._closed:
+                        worker.kill()
+                        worker.wait()
+                        return
+                    self._idle.append(worker)
+
+    def _take(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.popleft()
+                if worker.poll() is None:
+                    return worker
+                worker.wait()
+        return None
+
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+    def launch(self, server_path, env=None, log_path=None, log_bytes=None):
+        """Run server_path in a warm worker (or a fresh one if the pool is empty).
+
+        Returns the worker's Popen object; its (binary) stdout carries the
+        server's output, or only its port line when log_path is given.
+        """
+        worker = self._take()
+        if worker is None:
+            worker = self._spawn()
+        self._wakeup.set()
+
+        request = {'path': os.path.abspath(server_path), 'env': env or {},
+                   'log': log_path and os.path.abspath(log_path), 'log_bytes': log_bytes}
+        worker.stdin.write((json.dumps(request) + '\n').encode())
+        worker.stdin.flush()
+        worker.stdin.close()
+        return worker
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        self._wakeup.set()
+        for worker in idle:
+            worker.kill()
+            worker.wait()
+
+
+if __name__ == '__main__':
+    if '--worker' in sys.argv[1:]:
+        _worker_main()
+    else:
+        print('Usage: python launcher.py --worker (started by LauncherPool)')
+        sys.exit(1)
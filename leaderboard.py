@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Leaderboard kept in a Redis sorted set.
+
+Every student is a member (by name) with a score that orders like the
+ranking query (most solves first, earlier last solve first on ties):
+
+    score = solved_count * TIME_SPAN + (TIME_SPAN - 1 - last_solved_epoch)
+
+Students with no solves get last_solved_epoch = 0.  Scores stay below 2**53,
+so they are exact as Redis doubles.  submit_answer updates the score right
+after committing a solve; public_ranking reads the top N with ZREVRANGE.
+
+Every change also bumps `{key}:version`, so rendered ranking pages can be
+cached and validated against it.  Pages are addressed by keyset cursors
+("<score>:<name>" of the last/first row shown) rather than offsets, so a
+page stays anchored to a student while others move around it.
+
+Recovery (e.g. after a Redis flush) rebuilds the set from SQLite:
+
+    python leaderboard.py rebuild
+"""
+
+import calendar
+import sys
+import time
+
+LEADERBOARD_KEY = 'leaderboard'
+TIME_SPAN = 10 ** 10  # > any epoch second we will see
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # SQLite CURRENT_TIMESTAMP (UTC)
+
+
+def encode_score(solved_count, last_solved):
+    epoch = calendar.timegm(time.strptime(last_solved[:19], TIMESTAMP_FORMAT)) if last_solved else 0
+    return solved_count * TIME_SPAN + (TIME_SPAN - 1 - epoch)
+
+
+def decode_score(score):
+    """(solved_count, last_solved or None)"""
+    solved_count, remainder = divmod(int(score), TIME_SPAN)
+    epoch = TIME_SPAN - 1 - remainder
+    last_solved = time.strftime(TIMESTAMP_FORMAT, time.gmtime(epoch)) if epoch else None
+    return solved_count, last_solved
+
+
+def valid_cursor(cursor):
+    """True for a well-formed "<score>:<name>" page cursor"""
+    score, sep, name = (cursor or '').partition(':')
+    return bool(sep and name and score.isdigit())
+
+
+class Leaderboard:
+    def __init__(self, redis_client, key=LEADERBOARD_KEY):
+        self.redis = redis_client
+        self.key = key
+        self.version_key = f'{key}:version'
+
+    def update(self, name, solved_count, last_solved):
+        """Set a student's score from their current totals in SQLite"""
+        pipe = self.redis.pipeline()
+        pipe.zadd(self.key, {name: encode_score(solved_count, last_solved)})
+        pipe.incr(self.version_key)
+        pipe.execute()
+
+    def record_solve(self, name, solved_count, last_solved):
+        """Like update(), but never lowers a score if concurrent solves race.
+
+        The version is only bumped if the score changed, so replaying a solve
+        that is already on the board keeps cached pages valid.
+        """
+        if self.redis.zadd(self.key, {name: encode_score(solved_count, last_solved)}, gt=True, ch=True):
+            self.redis.incr(self.version_key)
+
+    def remove(self, *names):
+        if names:
+            pipe = self.redis.pipeline()
+            pipe.zrem(self.key, *names)
+            pipe.incr(self.version_key)
+            pipe.execute()
+
+    def version(self):
+        return int(self.redis.get(self.version_key) or 0)
+
+    def exists(self):
+        return bool(self.redis.exists(self.key))
+
+    def top(self, limit=None):
+        """[{'name', 'solved_count', 'last_solved'}] in ranking order"""
+        end = -1 if limit is None else limit - 1
+        return [dict(zip(('name', 'solved_count', 'last_solved'), (name, *decode_score(score))))
+                for name, score in self.redis.zrevrange(self.key, 0, end, withscores=True)]
+
+    def _position(self, cursor):
+        """Index of the cursor's student, or where it would sit if it was removed"""
+        score, _, name = cursor.partition(':')
+        rank = self.redis.zrevrank(self.key, name)
+        if rank is not None:
+            return rank, True
+        return self.redis.zcount(self.key, f'({int(score)}', '+inf'), False
+
+    def page(self, limit, after=None, before=None):
+        """One page of the ranking: (rows, prev_cursor, next_cursor).
+
+        Rows carry 'rank' and 'cursor' besides the top() fields; a cursor is
+        None when there is nothing in that direction.  Malformed cursors are
+        ignored (first page).
+        """
+        after = after if valid_cursor(after) else None
+        before = before if valid_cursor(before) else None
+        start = 0
+        if after:
+            position, found = self._position(after)
+            start = position + 1 if found else position
+        elif before:
+            position, _ = self._position(before)
+            if position:  # at the top already: show the first page
+                start = max(0, position - limit)
+                limit = min(limit, position)
+        entries = self.redis.zrevrange(self.key, start, start + limit, withscores=True)
+
+        rows = []
+        for offset, (name, score) in enumerate(entries[:limit]):
+            solved_count, last_solved = decode_score(score)
+            rows.append({'rank': start + offset + 1, 'name': name, 'solved_count': solved_count,
+                         'last_solved': last_solved, 'cursor': f'{int(score)}:{name}'})
+        prev_cursor = rows[0]['cursor'] if rows and start > 0 else None
+        next_cursor = rows[-1]['cursor'] if len(entries) > limit else None
+        return rows, prev_cursor, next_cursor
+
+    def counts(self):
+        """(students, students with at least one solve)"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zcard(self.key)
+        pipe.zcount(self.key, TIME_SPAN, '+inf')
+        return tuple(pipe.execute())
+
+    def rebuild(self, db):
+        """Replace the set with the totals in SQLite (students.solved_count/last_solved)"""
+        rows = db.execute('SELECT name, solved_count, last_solved FROM students').fetchall()
+        staging = f'{self.key}:rebuild'
+        pipe = self.redis.pipeline()
+        pipe.delete(staging)
+        if rows:
+            pipe.zadd(staging, {row['name']: encode_score(row['solved_count'], row['last_solved'])
+                                for row in rows})
+            pipe.rename(staging, self.key)
+        else:
+            pipe.delete(self.key)
+        pipe.incr(self.version_key)
+        pipe.execute()
+        return len(rows)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['rebuild']:
+        sys.exit('usage: python leaderboard.py rebuild')
+    from app import get_db, leaderboard
+    db = get_db()
+    print(f"Leaderboard rebuilt with {leaderboard.rebuild(db)} students")
+    db.close()
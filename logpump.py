@@ -0,0 +1,64 @@
+"""
+Size-capped logs for challenge instance output.
+
+Challenge servers print on every connection, so their output is kept in a
+size-capped log per instance:
+
+    logs/instances/{key}.log     current segment (at most max_bytes)
+    logs/instances/{key}.log.1   previous segment
+
+so each instance costs at most 2 * max_bytes of disk.  The server process
+writes its own RingLog (launcher.py), because a pipe read by one web worker
+breaks when that worker restarts; the web app only locates and tails the
+files.
+"""
+
+import os
+import re
+
+
+class RingLog:
+    """Append-only log that rotates to a single .1 segment at max_bytes"""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.file = open(path, 'ab')
+        self.size = self.file.tell()
+
+    def write(self, data):
+        if self.size + len(data) > self.max_bytes:
+            self.file.close()
+            os.replace(self.path, self.path + '.1')
+            self.file = open(self.path, 'ab')
+            self.size = 0
+            data = data[-self.max_bytes:]
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+
+    def close(self):
+        self.file.close()
+
+
+class InstanceLogs:
+    """Where each instance's log lives, and reading it back"""
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+
+    def path_for(self, key):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        return os.path.join(self.log_dir, f"{safe}.log")
+
+    def tail(self, key, lines=100):
+        """Last `lines` lines logged for `key` (across both segments)"""
+        path = self.path_for(key)
+        data = b''
+        for segment in (path + '.1', path):
+            try:
+                with open(segment, 'rb') as f:
+                    data += f.read()
+            except FileNotFoundError:
+                pass
+        return data.decode(errors='replace').splitlines()[-lines:]
@@ -0,0 +1,47 @@
+"""
+Cache for rendered pages whose content is fully determined by a key.
+
+Callers build the key from whatever versions the page depends on (e.g. the
+leaderboard version and the page cursor), so entries never need explicit
+invalidation: a change produces a new key and stale entries age out of the
+LRU.  The same key doubles as the page's ETag.
+"""
+
+import collections
+import hashlib
+import threading
+
+
+def etag_for(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """Cached output for `key`, calling render() to produce it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Render outside the lock; two concurrent misses just render twice
+        output = render()
+        with self._lock:
+            self._entries[key] = output
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return output
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,117 @@
+"""
+Password hashing for student accounts.
+
+New hashes use scrypt, stored as
+
+    scrypt$<n>$<r>$<p>$<salt b64>$<hash b64>
+
+Accounts created before that still hold a bare SHA-256 hex digest; they
+verify as before and get rehashed to scrypt on their next successful login.
+
+Hashing is deliberately slow (~50 ms of CPU), so the web app runs it in
+worker processes: LoginVerifier bounds how many logins may be queued and
+sheds the rest immediately instead of letting requests pile up.  Functions
+run in workers must be importable by name, hence this separate module.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+
+class LoginOverloaded(Exception):
+    """Too many logins in flight; the client should retry shortly"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode()
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * 1024 * 1024)
+
+
+def hash_password(password):
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def needs_rehash(stored):
+    return not stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+def verify_password(password, stored):
+    if stored.startswith('scrypt$'):
+        _, n, r, p, salt, digest = stored.split('$')
+        computed = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(computed, base64.b64decode(digest))
+    # Legacy: unsalted SHA-256 hex
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+
+
+def check_password(password, stored):
+    """Worker task: (valid, new hash to store or None)"""
+    if not verify_password(password, stored):
+        return False, None
+    return True, hash_password(password) if needs_rehash(stored) else None
+
+
+class LoginVerifier:
+    """Runs check_password in an executor with a cap on queued + running checks"""
+
+    def __init__(self, executor_factory, max_pending=64, timeout=10):
+        self._executor_factory = executor_factory
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.timeout = timeout
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._executor_factory()
+            return self._executor
+
+    def _discard(self, executor):
+        """Drop a broken executor; the next check starts a fresh one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def check(self, password, stored):
+        """(valid, new hash or None); raises LoginOverloaded when saturated"""
+        if not self._slots.acquire(blocking=False):
+            raise LoginOverloaded('too many logins in progress')
+        executor = None
+        try:
+            executor = self._get_executor()
+            future = executor.submit(check_password, password, stored)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._discard(executor)
+            raise LoginOverloaded('login workers are restarting')
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot stays taken until the worker is done, even if we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise LoginOverloaded('login check timed out')
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory): every later submit would fail too
+            self._discard(executor)
+            raise LoginOverloaded('login workers are restarting')
@@ -0,0 +1,128 @@
+"""
+Redis-backed port allocator for challenge instances.
+
+Ports are leased from a configured range instead of probing with bind(0):
+
+    ports:free          -> set of ports available for lease
+    ports:leased        -> sorted set of leased ports scored by lease expiry
+    port:lease:{port}   -> owner (instance key), with the lease TTL
+    ports:range         -> "start-end" the free set was built for
+
+Leasing and releasing are single Lua calls, so two launches can never be
+handed the same port and the "{port}" -> answer key is written exactly once
+for the port the child will bind.
+"""
+
+import time
+
+FREE_KEY = 'ports:free'
+LEASED_KEY = 'ports:leased'
+LEASE_PREFIX = 'port:lease:'
+RANGE_KEY = 'ports:range'
+
+LEASE_SCRIPT = """
+for i = 1, 16 do
+    local port = redis.call('SPOP', KEYS[1])
+    if not port then
+        return false
+    end
+    if redis.call('SET', ARGV[1] .. port, ARGV[2], 'NX', 'EX', ARGV[3]) then
+        redis.call('ZADD', KEYS[2], ARGV[4], port)
+        return port
+    end
+end
+return false
+"""
+
+RELEASE_SCRIPT = """
+local lease = ARGV[1] .. ARGV[2]
+if redis.call('GET', lease) ~= ARGV[3] then
+    return 0  -- not ours (or already expired; reclaim_expired returns it)
+end
+redis.call('DEL', lease)
+redis.call('ZREM', KEYS[2], ARGV[2])
+redis.call('SADD', KEYS[1], ARGV[2])
+return 1
+"""
+
+RENEW_SCRIPT = """
+if redis.call('GET', ARGV[1] .. ARGV[2]) ~= ARGV[3] then
+    return 0
+end
+redis.call('EXPIRE', ARGV[1] .. ARGV[2], ARGV[4])
+redis.call('ZADD', KEYS[1], ARGV[5], ARGV[2])
+return 1
+"""
+
+# Ports whose lease key expired without a release go back to the free set
+RECLAIM_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[2])
+local reclaimed = 0
+for _, port in ipairs(expired) do
+    if redis.call('EXISTS', ARGV[1] .. port) == 0 then
+        redis.call('ZREM', KEYS[2], port)
+        redis.call('SADD', KEYS[1], port)
+        reclaimed = reclaimed + 1
+    end
+end
+return reclaimed
+"""
+
+
+class PortAllocator:
+    def __init__(self, redis_client, start, end, lease_ttl=3600):
+        self.redis = redis_client
+        self.start = start
+        self.end = end
+        self.lease_ttl = lease_ttl
+        self._lease = redis_client.register_script(LEASE_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+        self._renew = redis_client.register_script(RENEW_SCRIPT)
+        self._reclaim = redis_client.register_script(RECLAIM_SCRIPT)
+        self._ready = False
+
+    def ensure_range(self):
+        """(Re)build the free set if it was built for a different range"""
+        if self._ready:
+            return
+        wanted = f"{self.start}-{self.end}"
+        if self.redis.get(RANGE_KEY) != wanted:
+            with self.redis.lock('lock:' + RANGE_KEY, timeout=30, blocking_timeout=30):
+                if self.redis.get(RANGE_KEY) != wanted:
+                    leased = set(self.redis.zrange(LEASED_KEY, 0, -1))
+                    free = [port for port in range(self.start, self.end + 1) if str(port) not in leased]
+                    pipe = self.redis.pipeline()
+                    pipe.delete(FREE_KEY)
+                    for i in range(0, len(free), 1000):
+                        pipe.sadd(FREE_KEY, *free[i:i + 1000])
+                    pipe.set(RANGE_KEY, wanted)
+                    pipe.execute()
+        self._ready = True
+
+    def lease(self, owner):
+        """Lease a free port for `owner`; returns None if the range is exhausted"""
+        for attempt in range(2):
+            self.ensure_range()
+            expires = time.time() + self.lease_ttl
+            port = self._lease(keys=[FREE_KEY, LEASED_KEY],
+                               args=[LEASE_PREFIX, owner, self.lease_ttl, expires])
+            if port:
+                return int(port)
+            self._ready = False  # Redis may have been flushed; rebuild once and retry
+        return None
+
+    def release(self, port, owner):
+        """Return a port to the free set (no-op unless `owner` holds the lease)"""
+        return bool(self._release(keys=[FREE_KEY, LEASED_KEY], args=[LEASE_PREFIX, int(port), owner]))
+
+    def renew(self, port, owner):
+        expires = time.time() + self.lease_ttl
+        return bool(self._renew(keys=[LEASED_KEY],
+                                args=[LEASE_PREFIX, int(port), owner, self.lease_ttl, expires]))
+
+    def reclaim_expired(self):
+        """Return ports of leases that timed out to the free set; returns the count"""
+        return self._reclaim(keys=[FREE_KEY, LEASED_KEY], args=[LEASE_PREFIX, time.time()])
+
+    def free_count(self):
+        return self.redis.scard(FREE_KEY)
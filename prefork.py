@@ -0,0 +1,176 @@
+"""
+Prefork multi-process server for the Flask app.
+
+The master binds the listening socket once, then forks `workers` children
+that each serve it with a threaded Werkzeug server; the kernel spreads
+incoming connections across them, so the web tier uses every core instead
+of one GIL.  The master only supervises:
+
+    worker exits        respawned (at most once per second per slot)
+    SIGHUP              rolling restart, one worker at a time
+    SIGTERM / SIGINT    workers finish in-flight requests, then exit
+
+Each worker runs `on_worker_start` (e.g. start_background_services) after
+the fork, so threads and pools are never inherited half-initialized.
+Sessions survive worker restarts because the secret key is persisted and
+session data is either in the signed cookie or in Redis.
+
+Unix only (os.fork); run_production.py falls back to one process elsewhere.
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from werkzeug.serving import make_server
+
+RESPAWN_DELAY = 1.0
+STOP_TIMEOUT = 30
+
+
+class PreforkServer:
+    def __init__(self, app, host='0.0.0.0', port=5000, workers=None, backlog=1024, on_worker_start=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 2
+        self.backlog = backlog
+        self.on_worker_start = on_worker_start
+        self._children = {}  # pid -> slot
+        self._stopping = False
+        self._reload = False
+        self.sock = None
+
+    def bind(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(self.backlog)
+        self.port = self.sock.getsockname()[1]
+        self.sock.set_inheritable(True)
+        return self.port
+
+    def _spawn(self, slot):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = slot
+            return pid
+        # Child: serve until told to stop, never return into the master's loop
+        code = 0
+        try:
+            self._run_worker()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _run_worker(self):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)  # meant for the master
+        server = make_server(self.host, self.port, self.app, threaded=True, fd=self.sock.fileno())
+
+        def stop(signum, frame):
+            # shutdown() waits for serve_forever to return, so not from this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        if self.on_worker_start:
+            self.on_worker_start()
+        server.serve_forever()
+        server.server_close()
+
+    def _signal_children(self, sig, pids=None):
+        for pid in list(pids if pids is not None else self._children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self, block=False):
+        """Collect exited children; returns their slots"""
+        slots = []
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                slots.extend(self._children.values())  # no children left at all
+                self._children.clear()
+                break
+            if pid == 0:
+                break
+            if pid in self._children:
+                slots.append(self._children.pop(pid))
+            if block:
+                break
+        return slots
+
+    def _rolling_restart(self):
+        """Replace each worker in turn; its successor is started before it is stopped"""
+        for pid, slot in list(self._children.items()):
+            if self._stopping:
+                return
+            self._spawn(slot)
+            del self._children[pid]
+            self._signal_children(signal.SIGTERM, [pid])
+            deadline = time.monotonic() + STOP_TIMEOUT
+            try:
+                while not os.waitpid(pid, os.WNOHANG)[0]:
+                    if time.monotonic() > deadline:
+                        os.kill(pid, signal.SIGKILL)
+                        os.waitpid(pid, 0)
+                        break
+                    time.sleep(0.1)
+            except ChildProcessError:
+                pass
+
+    def serve_forever(self):
+        if self.sock is None:
+            self.bind()
+
+        def on_stop(signum, frame):
+            self._stopping = True
+
+        def on_hup(signum, frame):
+            self._reload = True
+
+        signal.signal(signal.SIGTERM, on_stop)
+        signal.signal(signal.SIGINT, on_stop)
+        signal.signal(signal.SIGHUP, on_hup)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        last_spawn = {}
+        try:
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    self._rolling_restart()
+                for slot in self._reap():
+                    # A worker that dies right away would otherwise be restarted in a tight loop
+                    wait = last_spawn.get(slot, 0) + RESPAWN_DELAY - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    print(f"Worker in slot {slot} exited, starting a new one")
+                    last_spawn[slot] = time.monotonic()
+                    self._spawn(slot)
+                time.sleep(0.2)
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopping = True
+        self._signal_children(signal.SIGTERM)
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        self._signal_children(signal.SIGKILL)
+        while self._children:
+            if not self._reap(block=True):
+                break
+        self.sock.close()
@@ -0,0 +1,109 @@
+"""
+Background reaper for challenge instances.
+
+Every `interval` seconds it:
+  - stops instances whose last activity is older than `idle_timeout`;
+    besides web requests, a client connected to the instance's port or
+    output in its log counts as activity, so a student working with nc or
+    a script is not cut off,
+  - collects exit status of instances launched by this process that died
+    on their own (no zombies left behind),
+  - drops the matching Redis keys in one transaction per instance,
+  - returns ports whose lease timed out to the allocator's free set.
+
+Reclaimed counts are kept in the `reaper:stats` hash so every web worker
+(and the admin page) sees the same numbers.
+"""
+
+import os
+import threading
+import time
+
+from launcher import port_connected
+
+STATS_KEY = 'reaper:stats'
+
+
+class InstanceReaper:
+    def __init__(self, registry, idle_timeout=1800, interval=30, log_path=None):
+        self.registry = registry
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.log_path = log_path  # key -> the instance's log file
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Reaper error: {e}")
+
+    def last_seen(self, key, record):
+        """Time of the latest TCP use of the instance, or None if unknown"""
+        if port_connected(record['port']):
+            return time.time()
+        if self.log_path:
+            try:
+                return os.path.getmtime(self.log_path(key))
+            except OSError:
+                pass
+        return None
+
+    def run_once(self):
+        """One sweep; returns the number of instances reclaimed per reason"""
+        registry = self.registry
+        counts = {'idle': 0, 'exited': 0, 'ports': 0}
+
+        for key, pid in registry.exited_children():
+            with registry.lock(key):
+                record = registry.get(key)
+                if record is None:
+                    registry.forget(key)
+                elif record['pid'] == pid:
+                    registry.stop(key, record, expired=True)
+                else:
+                    # Another worker has since started a new instance for this key
+                    registry.drop_handle(key, pid)
+            counts['exited'] += 1
+
+        cutoff = time.time() - self.idle_timeout
+        # Look one sweep ahead, so instances used over TCP are touched before their keys expire
+        soon = cutoff + 2 * self.interval
+        for key in registry.idle_keys(soon):
+            with registry.lock(key):
+                record = registry.get(key)
+                if record is None:
+                    registry.forget(key)
+                elif record['last_activity'] <= soon:  # not touched while we waited
+                    seen = self.last_seen(key, record)
+                    if seen is not None and seen > max(record['last_activity'], cutoff):
+                        registry.touch(key, record['port'], at=seen)
+                    elif record['last_activity'] <= cutoff:
+                        registry.stop(key, record, expired=True)
+                        counts['idle'] += 1
+
+        if registry.ports:
+            counts['ports'] = registry.ports.reclaim_expired()
+
+        pipe = registry.redis.pipeline()
+        pipe.hincrby(STATS_KEY, 'runs', 1)
+        pipe.hincrby(STATS_KEY, 'reclaimed_idle', counts['idle'])
+        pipe.hincrby(STATS_KEY, 'reaped_exited', counts['exited'])
+        pipe.hincrby(STATS_KEY, 'ports_reclaimed', counts['ports'])
+        pipe.hset(STATS_KEY, 'last_run', int(time.time()))
+        pipe.execute()
+        return counts
+
+    def stats(self):
+        stats = self.registry.redis.hgetall(STATS_KEY)
+        return {name: int(value) for name, value in stats.items()}
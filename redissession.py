@@ -0,0 +1,97 @@
+"""
+Server-side Flask sessions stored in Redis.
+
+The cookie holds only a random session id; the data lives in
+
+    session:{sid}    JSON of the session dict, expires after `ttl` seconds
+
+so every web worker sees the same sessions, logging out really ends the
+session, and nothing but the id ever leaves the server.  The key's expiry
+is pushed forward on each request that carries the session (unless
+SESSION_REFRESH_EACH_REQUEST is off), so `ttl` is how long an idle session
+lives; the cookie itself is re-sent only as Flask would (permanent
+sessions), otherwise it lasts until the browser closes.
+
+A cookie naming an id that is unknown or empty gets a fresh id.  A known
+id is replaced (and its key deleted) whenever the session's student_id
+changes or the session is cleared, so an id planted in a victim's browser
+before they log in never becomes a logged-in session (session fixation).
+"""
+
+import json
+import secrets
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+SESSION_PREFIX = 'session:'
+
+
+def new_sid():
+    return secrets.token_urlsafe(32)
+
+
+class RedisSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.opened_as = self.get('student_id')  # login the stored session was loaded with
+        self.rotate = False
+
+    def clear(self):
+        super().clear()
+        self.rotate = True
+
+
+class RedisSessionInterface(SessionInterface):
+    def __init__(self, redis_client, ttl=7 * 24 * 3600, prefix=SESSION_PREFIX):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.redis.get(self.prefix + sid)
+            if data:
+                return RedisSession(json.loads(data), sid=sid)
+        return RedisSession(sid=new_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.redis.delete(self.prefix + session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        if not session.new and (session.rotate or session.get('student_id') != session.opened_as):
+            # Logged in, out or as someone else: the old id must stop working
+            self.redis.delete(self.prefix + session.sid)
+            session.sid = new_sid()
+            session.modified = True
+
+        response.vary.add('Cookie')
+        if session.modified:
+            self.redis.set(self.prefix + session.sid, json.dumps(dict(session)), ex=self.ttl)
+        elif app.config['SESSION_REFRESH_EACH_REQUEST']:
+            self.redis.expire(self.prefix + session.sid, self.ttl)
+        if not self.should_set_cookie(app, session):
+            return
+        response.set_cookie(name, session.sid,
+                            expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain,
+                            path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
@@ -2,12 +2,25 @@
 """
 Production startup script for the CTF platform
 This script runs without auto-reload to prevent restart when tmp files change
+
+Serves with WORKERS prefork processes (prefork.py; default: one per core).
+With --workers 1, or where os.fork is unavailable, it runs a single
+threaded server as before.
+
+Usage: python run_production.py [--workers N] [--host HOST] [--port PORT]
 """
 
+import argparse
 import os
 import sys
 
 def main():
+    parser = argparse.ArgumentParser(description='Run the CTF platform')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('CTF_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+
     print("=== CTF Platform Production Mode ===\n")
 
     # Set environment for production
@@ -19,19 +32,27 @@ def main():
     os.makedirs(temp_dir, exist_ok=True)
     os.makedirs(checked_dir, exist_ok=True)
 
-    print("Admin interface: http://localhost:5000/admin")
-    print("Student interface: http://localhost:5000")
-    print("Ranking page: http://localhost:5000/ranking")
+    print(f"Admin interface: http://localhost:{args.port}/admin")
+    print(f"Student interface: http://localhost:{args.port}")
+    print(f"Ranking page: http://localhost:{args.port}/ranking")
     print("Demo accounts: alice/password123, bob/password456, charlie/password789")
     print("\nPress Ctrl+C to stop the server\n")
 
     # Start the Flask application without auto-reload
     try:
-        from app import app, init_db
+        from app import app, init_db, start_background_services
         init_db()
 
-        # Run in production mode without auto-reload
-        app.run(debug=False, host='0.0.0.0', port=5000, use_reloader=False)
+        if args.workers > 1 and hasattr(os, 'fork'):
+            from prefork import PreforkServer
+            print(f"Starting {args.workers} workers (kill -HUP {os.getpid()} restarts them one by one)")
+            # Each worker warms its own challenge interpreters and runs a reaper after the fork
+            PreforkServer(app, host=args.host, port=args.port, workers=args.workers,
+                          on_worker_start=start_background_services).serve_forever()
+        else:
+            start_background_services()  # warm challenge interpreters, start the instance reaper
+            # Run in production mode without auto-reload
+            app.run(debug=False, host=args.host, port=args.port, use_reloader=False)
     except KeyboardInterrupt:
         print("\nShutting down server...")
     except Exception as e:
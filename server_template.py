@@ -2,13 +2,16 @@
 import socket
 import threading
 import sys
-from server_utils import get_ctf_answer
+from server_utils import get_ctf_answer, get_server_port
 
 # CHANGE THIS FUNCTION TO IMPLEMENT YOUR SERVER LOGIC
 def handle_client(conn: socket.socket, addr: tuple, expected_answer: str) -> None:
     return
 
-def start_server(host: str = '0.0.0.0', port: int = 0) -> None:
+def start_server(host: str = '0.0.0.0', port: int = None) -> None:
+    if port is None:
+        port = get_server_port()  # port do hệ thống cấp (CTF_PORT), 0 nếu chạy tay
+
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sock.bind((host, port))  # bind đến port tự động nếu port=0
     port = sock.getsockname()[1]
@@ -1,36 +1,72 @@
+import contextlib
+import contextvars
+import os
 import redis
 import socket
+import threading
 
-redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+# (port, answer) of the instance a gateway handler is serving; the gateway
+# hosts many instances in one process, so the env vars below don't apply there
+_current_instance = contextvars.ContextVar('ctf_instance', default=None)
+_answer_cache = {}  # port -> answer looked up in Redis
+_redis_client = None
+_redis_lock = threading.Lock()
+
+def _get_redis():
+    """One pooled connection per process, opened on first fallback lookup"""
+    global _redis_client
+    with _redis_lock:
+        if _redis_client is None:
+            _redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+        return _redis_client
+
+@contextlib.contextmanager
+def serving_instance(port, answer):
+    """Used by gateway.py around each handle_client call"""
+    token = _current_instance.set((port, answer))
+    try:
+        yield
+    finally:
+        _current_instance.reset(token)
+
+def get_server_port():
+    """
+    Port leased for this server by the platform (CTF_PORT), or 0 to let the
+    OS pick one when the server is run by hand.  Inside the gateway it is
+    the port of the instance whose client is being handled.
+    """
+    instance = _current_instance.get()
+    if instance is not None:
+        return instance[0]
+    return int(os.environ.get('CTF_PORT', 0))
 
 def get_ctf_answer(port=None):
     """
     Common function for all server code to get the correct CTF answer.
-    This function looks up the answer in Redis using the provided port,
-    or tries to determine the port automatically.
+    The platform hands the answer to the server at spawn (CTF_ANSWER); the
+    Redis lookup by port is only a fallback for servers started some other
+    way.  Answers are cached, so calling this per connection is cheap.
+    Inside the gateway, handle_client gets the answer of the instance it
+    serves (not valid in module top-level code, which instances share).
     """
-    try:
-        # If port is not provided, try to determine it automatically
-        if port is None:
-            import inspect
-            frame = inspect.currentframe()
-            while frame:
-                local_vars = frame.f_locals
-                if 'server_socket' in local_vars:
-                    port = local_vars['server_socket'].getsockname()[1]
-                    break
-                if 'port' in local_vars and isinstance(local_vars['port'], int):
-                    port = local_vars['port']
-                    break
-                frame = frame.f_back
-            else:
-                # Fallback: try to get from global variables or other methods
-                return None
-
-        # Look up the CTF answer in Redis using the port
-        ctf_answer = redis_client.get(str(port))
-        return ctf_answer
+    instance = _current_instance.get()
+    if instance is not None and port in (None, instance[0]):
+        return instance[1]
+
+    answer = os.environ.get('CTF_ANSWER')
+    if answer:
+        return answer
 
+    if port is None:
+        port = get_server_port()
+    if port in _answer_cache:
+        return _answer_cache[port]
+
+    try:
+        ctf_answer = _get_redis().get(str(port))
     except Exception as e:
         print(f"Error getting CTF answer: {e}")
-        return None
\ No newline at end of file
+        return None
+    if ctf_answer is not None:
+        _answer_cache[port] = ctf_answer
+    return ctf_answer
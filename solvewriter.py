@@ -0,0 +1,95 @@
+"""
+Single writer for solve records.
+
+Every correct submission used to run its own INSERT + commit, so a burst
+of solves meant one fsync and one trip through the database write lock per
+request.  SolveWriter owns one connection and a thread: submitters put
+(student_id, challenge_id) on a queue and block, the thread collects
+solves while they keep arriving (for at most `max_delay` seconds and
+`max_batch` records), inserts them in one transaction and acknowledges each
+submitter only after that commit returns.
+
+The writer connection uses synchronous=FULL, so an acknowledged solve has
+been fsynced; batching keeps that to one fsync per window instead of one
+per solve.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+INSERT_SQL = 'INSERT OR IGNORE INTO student_challenges (student_id, challenge_id) VALUES (?, ?)'
+
+
+class SolveWriter:
+    def __init__(self, connect, max_batch=256, max_delay=0.02, idle_gap=0.002):
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.idle_gap = idle_gap  # close the window early after this long without a new solve
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.records = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='solve-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, student_id, challenge_id, timeout=10):
+        """Record a solve; True if it was new.  Returns once the batch is committed."""
+        self.start()
+        future = Future()
+        self._queue.put((student_id, challenge_id, future))
+        return future.result(timeout=timeout)
+
+    def _loop(self):
+        db = None
+        while True:
+            batch = [self._queue.get()]
+            # Keep the window open while solves keep arriving, never past max_delay
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, self.idle_gap)))
+                except queue.Empty:
+                    break
+
+            try:
+                if db is None:
+                    db = self.connect()
+                    db.execute('PRAGMA synchronous=FULL')
+                self._write(db, batch)
+            except sqlite3.Error as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                if db is not None:
+                    db.close()
+                    db = None
+
+    def _write(self, db, batch):
+        results = []
+        try:
+            for student_id, challenge_id, future in batch:
+                try:
+                    results.append((future, db.execute(INSERT_SQL, (student_id, challenge_id)).rowcount == 1))
+                except sqlite3.IntegrityError as e:
+                    future.set_exception(e)  # only this record is bad; keep the rest of the batch
+            db.commit()
+        except BaseException:
+            if db.in_transaction:
+                db.rollback()
+            raise
+        self.batches += 1
+        self.records += len(results)
+        for future, inserted in results:
+            future.set_result(inserted)
@@ -79,9 +79,13 @@ def main():
 
     # Start the Flask application
     try:
-        from app import app
+        from app import app, start_background_services
         import os
 
+        # Only the reloader's child serves requests; start helpers there
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_background_services()
+
         # Configure Flask to exclude tmp directories from auto-reload
         app.config['EXCLUDE_PATTERNS'] = [
             os.path.join(os.getcwd(), 'tmp', '*'),
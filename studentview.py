@@ -0,0 +1,76 @@
+"""
+Cached view data for the student dashboard and challenge pages.
+
+The challenge list comes from the in-process ChallengeCatalog; per-student
+data is kept in Redis so every web worker shares it:
+
+    views:student:{id}        hash: solved = JSON {challenge_id: solved_at},
+                                    ports  = JSON {challenge_id: port}
+    views:student:{id}:gen    bumped by every invalidation
+
+Entries expire after `ttl` seconds and are dropped as soon as the data
+behind them changes (solve, instance start/stop), so a page load that finds
+them does not touch SQLite.  A loader WATCHes the generation key while it
+reads, so a load that raced an invalidation is not stored (it would hide
+the change until the entry expires).
+"""
+
+import json
+
+import redis
+
+from instances import instance_key
+
+STUDENT_PREFIX = 'views:student:'
+
+
+class StudentViews:
+    def __init__(self, redis_client, catalog, ttl=300):
+        self.redis = redis_client
+        self.catalog = catalog
+        self.ttl = ttl
+
+    def get(self, student_id, get_db):
+        """{'challenges': [...], 'solved': {id: solved_at}, 'ports': {id: port}}
+
+        `get_db` is called only when something has to be loaded from SQLite.
+        """
+        _, challenges = self.catalog.public(get_db)
+        student = self.redis.hgetall(STUDENT_PREFIX + str(student_id))
+        if 'solved' in student and 'ports' in student:
+            solved = json.loads(student['solved'])
+            ports = json.loads(student['ports'])
+        else:
+            solved, ports = self._load_student(get_db(), student_id, challenges)
+
+        return {'challenges': challenges,
+                'solved': {int(cid): solved_at for cid, solved_at in solved.items()},
+                'ports': {int(cid): port for cid, port in ports.items()}}
+
+    def _load_student(self, db, student_id, challenges):
+        key = STUDENT_PREFIX + str(student_id)
+        with self.redis.pipeline() as pipe:
+            pipe.watch(key + ':gen')  # before reading, so any invalidation from here on aborts the store
+            solved = {row['challenge_id']: row['solved_at'] for row in
+                      db.execute('SELECT challenge_id, solved_at FROM student_challenges WHERE student_id = ?',
+                                 (student_id,))}
+            ports = {}
+            if challenges:
+                values = self.redis.mget([instance_key(student_id, c['id']) for c in challenges])
+                ports = {c['id']: port for c, port in zip(challenges, values) if port}
+
+            pipe.multi()
+            pipe.hset(key, mapping={'solved': json.dumps(solved), 'ports': json.dumps(ports)})
+            pipe.expire(key, self.ttl)
+            try:
+                pipe.execute()
+            except redis.WatchError:
+                pass  # invalidated meanwhile: serve what we read, but don't cache it
+        return solved, ports
+
+    def invalidate(self, student_id):
+        key = STUDENT_PREFIX + str(student_id)
+        pipe = self.redis.pipeline()
+        pipe.delete(key)
+        pipe.incr(key + ':gen')
+        pipe.execute()
@@ -1,7 +1,7 @@
 import socket
 import threading
 import sys
-from server_utils import get_ctf_answer
+from server_utils import get_ctf_answer, get_server_port
 
 def handle_client(conn, addr, expected_answer):
     try:
@@ -24,7 +24,7 @@ def handle_client(conn, addr, expected_answer):
 
 def start_server():
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.bind(('0.0.0.0', 0))  # Bind to any available port
+    sock.bind(('0.0.0.0', get_server_port()))  # Leased port, or any available port
     port = sock.getsockname()[1]
 
     # Print port as first line (required by system)